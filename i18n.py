@@ -163,6 +163,7 @@ TRANSLATIONS = {
         'generating_image': 'Генерация изображения через {provider} ({model})...',
         'image_saved': 'Изображения сохранено: {path}',
         'video_saved': 'Видео сохранено: {path}',
+        'image_from_cache': 'Результат взят из кэша: {path}',
         'generating_captions': 'Генерация подписей (captions) для LoRA обучения...',
         'generating_caption_for': 'Генерация подписи для {name}...',
         'caption_saved': 'Подпись сохранена: {name}',
@@ -552,6 +553,7 @@ TRANSLATIONS = {
         'generating_image': 'Generating image via {provider} ({model})...',
         'image_saved': 'Image saved: {path}',
         'video_saved': 'Video saved: {path}',
+        'image_from_cache': 'Result taken from cache: {path}',
         'generating_captions': 'Generating captions for LoRA training...',
         'generating_caption_for': 'Generating caption for {name}...',
         'caption_saved': 'Caption saved: {name}',
@@ -926,3 +928,39 @@ def _(key: str, **kwargs) -> str:
     """
     return get_i18n().t(key, **kwargs)
 
+
+
+class LazyStr:
+    """Отложенный перевод: текст резолвится только при выводе (str/format)"""
+    
+    __slots__ = ('key', 'kwargs')
+    
+    def __init__(self, key: str, **kwargs):
+        self.key = key
+        self.kwargs = kwargs
+    
+    def __str__(self) -> str:
+        return get_i18n().t(self.key, **self.kwargs)
+    
+    def __format__(self, format_spec: str) -> str:
+        return format(str(self), format_spec)
+    
+    def __repr__(self) -> str:
+        return f"LazyStr({self.key!r})"
+
+
+def _l(key: str, **kwargs) -> LazyStr:
+    """
+    Получить ленивый перевод (переводится при выводе, а не при создании)
+    
+    Удобно для строк уровня модуля и веток меню, которые могут не выполниться:
+    язык выбирается уже после импорта модулей.
+    
+    Args:
+        key: Ключ перевода
+        **kwargs: Параметры для форматирования
+    
+    Returns:
+        Объект LazyStr
+    """
+    return LazyStr(key, **kwargs)
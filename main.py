@@ -13,6 +13,7 @@ from src import (
     select_or_create_profile,
     save_profile_menu,
     select_language,
+    setup_logging,
     Updater
 )
 
@@ -32,6 +33,7 @@ def main():
     """Главная функция"""
     # Выбор языка в самом начале
     select_language()
+    i18n = get_i18n()
     
     parser = argparse.ArgumentParser(
         description='Dataset Creation Bulk - Python аналог Make.com workflow'
@@ -73,6 +75,12 @@ def main():
         action='store_true',
         help='Показать список сохраненных профилей и выйти'
     )
+    parser.add_argument(
+        '--quiet',
+        '-q',
+        action='store_true',
+        help='Не выводить сообщения по каждому изображению (только ошибки и итог)'
+    )
     parser.add_argument(
         '--update',
         action='store_true',
@@ -95,10 +103,10 @@ def main():
     )
     
     args = parser.parse_args()
+    setup_logging(quiet=args.quiet)
     
     # Обработка команд обновления
     if args.update or args.check_updates or args.force_update:
-        i18n = get_i18n()
         updater = Updater()
         
         if args.check_updates:
@@ -121,7 +129,6 @@ def main():
     
     # Автоматическая проверка обновлений при запуске
     if args.auto_update_check:
-        i18n = get_i18n()
         updater = Updater()
         if updater.is_git_repo():
             print(f"\n🔍 {i18n.t('checking_updates')}")
@@ -142,7 +149,6 @@ def main():
     
     # Показать список профилей и выйти
     if args.list_profiles:
-        i18n = get_i18n()
         config = Config(args.config)
         profiles = config.list_profiles()
         if profiles:
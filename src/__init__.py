@@ -7,10 +7,9 @@ from .config import Config
 from .file_manager import LocalFileManager
 from .prompt_generator import PromptGenerator
 from .image_generator import ImageGenerator
-from .caption_generator import CaptionGenerator
 from .dataset_creator import DatasetCreator
 from .interactive_menu import interactive_menu, select_or_create_profile, save_profile_menu
-from .utils import select_language
+from .utils import select_language, setup_logging
 from .updater import Updater
 
 __all__ = [
@@ -24,8 +23,17 @@ __all__ = [
     'select_or_create_profile',
     'save_profile_menu',
     'select_language',
+    'setup_logging',
     'Updater',
 ]
 
 __version__ = '1.0.0'
 
+
+def __getattr__(name):
+    # CaptionGenerator загружается при первом обращении (нужен только для captions)
+    if name == 'CaptionGenerator':
+        from .caption_generator import CaptionGenerator
+        return CaptionGenerator
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
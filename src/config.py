@@ -2,32 +2,277 @@
 
 import os
 import json
+import copy
+import types
+from collections import OrderedDict
+from dataclasses import dataclass, field, fields
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime
 
+# Быстрый JSON (опционально), иначе стандартный json
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+    
+    def _loads(data: bytes):
+        return orjson.loads(data)
+    
+    def _dumps(obj, indent: bool = True) -> bytes:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+except ImportError:
+    ORJSON_AVAILABLE = False
+    
+    def _loads(data: bytes):
+        return json.loads(data)
+    
+    def _dumps(obj, indent: bool = True) -> bytes:
+        return json.dumps(obj, indent=2 if indent else None, ensure_ascii=False).encode('utf-8')
+
+# Значения по умолчанию для моделей и настроек профиля (единая точка изменения)
+_DEFAULTS = types.MappingProxyType({
+    'gemini_model': 'gemini-2.5-flash',
+    'openai_model': 'gpt-5.1',
+    'grok_model': 'grok-4-1-fast-reasoning',
+    'caption_provider': 'openai',
+    'wavespeed_size': '2880*4096',
+    'wavespeed_resolution': '1k',
+    'wavespeed_output_format': 'png',
+    'prompt_template': 'bulk',
+})
+
+# Пометка в каждом сохраненном профиле
+_NOTE = 'API ключи хранятся в config.json и не сохраняются в профилях'
+
+# Кэш базового config.json, общий для всех экземпляров Config:
+# абсолютный путь -> ((st_mtime_ns, st_size), данные)
+_BASE_CACHE: Dict[str, Tuple[Tuple[int, int], Dict]] = {}
+
+# LRU кэш разобранных профилей: путь (str) -> (st_mtime_ns, st_size, данные)
+# Неизмененные файлы не перечитываются при повторных вызовах list_profiles
+_PROFILE_CACHE_MAX = 1000
+_PROFILE_PARSE_CACHE: 'OrderedDict[str, Tuple[int, int, Dict]]' = OrderedDict()
+
+
+def _cache_profile(path: str, stamp: Tuple[int, int], profile: Dict):
+    """Запоминает разобранный профиль, вытесняя давно не использованную запись при переполнении"""
+    _PROFILE_PARSE_CACHE.pop(path, None)
+    if len(_PROFILE_PARSE_CACHE) >= _PROFILE_CACHE_MAX:
+        _PROFILE_PARSE_CACHE.popitem(last=False)
+    _PROFILE_PARSE_CACHE[path] = (*stamp, profile)
+
+
+def _parse_json_file(path: str) -> Dict:
+    """Читает JSON объект из файла; некорректный файл - ValueError с путем к нему"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    try:
+        parsed = _loads(data)
+    except ValueError as e:
+        raise ValueError(f"Некорректный JSON в файле {path}: {e}") from e
+    if not isinstance(parsed, dict):
+        raise ValueError(f"Файл {path} должен содержать JSON объект")
+    return parsed
+
+
+def _read_profile_file(path: str) -> Optional[Dict]:
+    """Читает и разбирает файл профиля (None, если файл недоступен или поврежден)"""
+    try:
+        with open(path, 'rb') as f:
+            profile = _loads(f.read())
+    except (OSError, ValueError):
+        return None
+    return profile if isinstance(profile, dict) else None
+
+
+def _is_video_model(model: Optional[str]) -> bool:
+    """Модель Wavespeed генерирует видео"""
+    return 'video' in (model or '').lower()
+
+
+@dataclass(frozen=True)
+class EffectiveSettings:
+    """Итоговые настройки провайдеров/моделей для одного типа контента (неизменяемые)"""
+    ai_provider: Optional[str]
+    gemini_model: str
+    openai_model: str
+    grok_model: str
+    wavespeed_model: str
+    caption_provider: str
+    openai_caption_model: str
+    grok_caption_model: str
+    # Применены ли отдельные настройки NSFW/normal (не участвует в сравнении и хэше)
+    overridden: bool = field(default=False, compare=False)
+    
+    @property
+    def is_video_model(self) -> bool:
+        return _is_video_model(self.wavespeed_model)
+
+
+_EFFECTIVE_FIELDS = tuple(f.name for f in fields(EffectiveSettings) if f.name != 'overridden')
+
 
 class Config:
     """Конфигурация приложения с поддержкой профилей"""
     
     PROFILES_DIR = "profiles"
     
+    # Настройки профиля: (атрибут, значение по умолчанию)
+    # Используется для значений по умолчанию, загрузки и сохранения профилей
+    _PROFILE_SCHEMA = (
+        # AI провайдер для промптов и модели (ключи загружаются из config.json)
+        ('ai_provider', None),
+        ('gemini_model', _DEFAULTS['gemini_model']),
+        ('openai_model', _DEFAULTS['openai_model']),
+        ('grok_model', _DEFAULTS['grok_model']),
+        
+        # Image generation провайдер и настройки Wavespeed
+        ('image_provider', None),
+        ('wavespeed_size', _DEFAULTS['wavespeed_size']),
+        ('wavespeed_model', ''),
+        ('wavespeed_resolution', _DEFAULTS['wavespeed_resolution']),
+        ('wavespeed_output_format', _DEFAULTS['wavespeed_output_format']),
+        
+        # Промпт шаблон
+        ('prompt_template', _DEFAULTS['prompt_template']),
+        
+        # LoRA captions настройки
+        ('trigger_name', ''),
+        ('generate_captions', False),
+        ('caption_provider', _DEFAULTS['caption_provider']),  # Провайдер для captions: 'openai' или 'grok'
+        ('openai_caption_model', _DEFAULTS['openai_model']),
+        ('grok_caption_model', _DEFAULTS['grok_model']),
+        
+        # Настройки для NSFW и обычного контента: модели для промптов
+        ('ai_provider_nsfw', None),
+        ('ai_provider_normal', None),
+        ('gemini_model_nsfw', _DEFAULTS['gemini_model']),
+        ('gemini_model_normal', _DEFAULTS['gemini_model']),
+        ('openai_model_nsfw', _DEFAULTS['openai_model']),
+        ('openai_model_normal', _DEFAULTS['openai_model']),
+        ('grok_model_nsfw', _DEFAULTS['grok_model']),
+        ('grok_model_normal', _DEFAULTS['grok_model']),
+        
+        # Модели для генерации изображений
+        ('wavespeed_model_nsfw', ''),
+        ('wavespeed_model_normal', ''),
+        
+        # Модели для captions
+        ('caption_provider_nsfw', _DEFAULTS['caption_provider']),
+        ('caption_provider_normal', _DEFAULTS['caption_provider']),
+        ('openai_caption_model_nsfw', _DEFAULTS['openai_model']),
+        ('openai_caption_model_normal', _DEFAULTS['openai_model']),
+        ('grok_caption_model_nsfw', _DEFAULTS['grok_model']),
+        ('grok_caption_model_normal', _DEFAULTS['grok_model']),
+        
+        # Флаг включения NSFW контента (по умолчанию отключен)
+        ('nsfw_enabled', False),
+    )
+    
+    # Атрибуты из базового config.json (пути, лимиты, API ключи)
+    _BASE_ATTRS = (
+        'config_file', 'profile_name', 'profiles_dir',
+        'influencer_ref_folder', 'sample_dataset_folder', 'output_folder',
+        'limit_ref_images', 'limit_sample_images',
+        'gemini_api_key', 'openai_api_key', 'grok_api_key', 'wavespeed_api_key',
+        'prompt_workers', 'image_workers', 'stat_workers',
+        'response_cache_dir', 'response_cache_ttl_hours', 'response_cache_max_mb',
+    )
+    
+    # Фиксированный набор атрибутов: без __dict__ на экземпляр, быстрый доступ
+    # (служебные поля идут первыми: copy/pickle восстанавливают слоты по порядку)
+    __slots__ = ('_loaded', '_base_cache', '_profile_cache') + _BASE_ATTRS + tuple(
+        attr for attr, _ in _PROFILE_SCHEMA
+    )
+    
+    # Атрибуты, которые заполняются при (ленивой) загрузке config.json и профиля
+    _LAZY_ATTRS = frozenset(_BASE_ATTRS[3:] + tuple(attr for attr, _ in _PROFILE_SCHEMA))
+    
     def __init__(self, config_file: Optional[str] = None, profile_name: Optional[str] = None):
+        self._loaded = False
+        self._base_cache = None
+        self._profile_cache = None
         self.config_file = config_file or "config.json"
         self.profile_name = profile_name
-        self.profiles_dir = Path(self.PROFILES_DIR)
-        self.profiles_dir.mkdir(exist_ok=True)
-        self.load_config()
+        # Папка профилей создается при первом сохранении профиля (см. _ensure_profiles_dir)
+        self.profiles_dir = _PROFILES_DIR
+        # Атрибуты заполняются при первом обращении к настройкам, но существующие файлы
+        # читаются и разбираются сразу: ошибка в config.json или профиле видна здесь,
+        # а не при первом обращении где-то в меню или рабочем потоке
+        # (отсутствующий config.json по-прежнему создается при первом обращении)
+        if profile_name and not (self.profiles_dir / f"{profile_name}.json").exists():
+            raise FileNotFoundError(f"Профиль '{profile_name}' не найден")
+        if os.path.isfile(self.config_file):
+            self._load_base()
+        if profile_name:
+            self._load_profile(profile_name)
+    
+    def __getattr__(self, name: str):
+        # Вызывается только для еще не заполненных атрибутов
+        if name in self._LAZY_ATTRS and not self._loaded:
+            self._ensure_loaded()
+            return object.__getattribute__(self, name)
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+    
+    def __setattr__(self, name: str, value):
+        # Явно заданное значение не должно затираться последующей ленивой загрузкой
+        if name in self._LAZY_ATTRS and not self._loaded:
+            self._ensure_loaded()
+        object.__setattr__(self, name, value)
+    
+    def _ensure_loaded(self):
+        """Загружает конфигурацию при первом обращении"""
+        if not self._loaded:
+            try:
+                self.load_config()
+            except BaseException:
+                self._loaded = False
+                raise
+    
+    def _load_base(self) -> Dict:
+        """Читает базовый config.json (общий кэш по mtime) или создает минимальный"""
+        if self._base_cache is None:
+            config_path = os.path.abspath(self.config_file)
+            try:
+                st = os.stat(config_path)
+            except FileNotFoundError:
+                st = None
+            if st is not None:
+                stamp = (st.st_mtime_ns, st.st_size)
+                cached = _BASE_CACHE.get(config_path)
+                if cached and cached[0] == stamp:
+                    self._base_cache = cached[1]
+                else:
+                    self._base_cache = _parse_json_file(config_path)
+                    _BASE_CACHE[config_path] = (stamp, self._base_cache)
+            else:
+                self._base_cache = self.get_minimal_config()
+                self.save_base_config(self._base_cache)
+        return self._base_cache
+    
+    def _load_profile(self, profile_name: str) -> Dict:
+        """Читает файл профиля (профиль текущего экземпляра кэшируется)"""
+        if profile_name == self.profile_name and self._profile_cache is not None:
+            return self._profile_cache
+        
+        profile_path = self.profiles_dir / f"{profile_name}.json"
+        if not profile_path.exists():
+            raise FileNotFoundError(f"Профиль '{profile_name}' не найден")
+        
+        profile = _parse_json_file(os.fspath(profile_path))
+        if profile_name == self.profile_name:
+            self._profile_cache = profile
+        return profile
     
     def load_config(self):
         """Загружает конфигурацию из файла или создает минимальную"""
+        self._loaded = True
+        
         # Загружаем базовый config.json (пути к папкам и API ключи)
-        if os.path.exists(self.config_file):
-            with open(self.config_file, 'r', encoding='utf-8') as f:
-                base_config = json.load(f)
-        else:
-            base_config = self.get_minimal_config()
-            self.save_base_config(base_config)
+        base_config = self._load_base()
         
         # Пути к папкам (всегда из базового config.json)
         self.influencer_ref_folder = base_config.get('influencer_ref_folder', './Influencer Reference Images')
@@ -44,6 +289,17 @@ class Config:
         self.grok_api_key = base_config.get('grok_api_key', '')
         self.wavespeed_api_key = base_config.get('wavespeed_api_key', '')
         
+        # Параллелизм обработки датасета (ограничен лимитами API провайдеров)
+        self.prompt_workers = max(1, int(base_config.get('prompt_workers', 4)))
+        self.image_workers = max(1, int(base_config.get('image_workers', 2)))
+        # Потоки для stat при сканировании папок (0 - последовательно, см. LocalFileManager)
+        self.stat_workers = max(0, int(base_config.get('stat_workers', 0)))
+        
+        # Кэш результатов Wavespeed (пустая папка - кэш отключен)
+        self.response_cache_dir = base_config.get('response_cache_dir', '')
+        self.response_cache_ttl_hours = base_config.get('response_cache_ttl_hours', 168)
+        self.response_cache_max_mb = base_config.get('response_cache_max_mb', 1024)
+        
         # Если указан профиль, загружаем его (переопределяет ключи если они там есть)
         if self.profile_name:
             self.load_from_profile(self.profile_name)
@@ -53,114 +309,22 @@ class Config:
     
     def set_minimal_defaults(self, base_config: Dict):
         """Устанавливает минимальные значения по умолчанию (не заполненные)"""
-        # AI провайдер для промптов
-        self.ai_provider = None
-        
-        # Модели (ключи уже загружены из config.json)
-        self.gemini_model = 'gemini-2.5-flash'
-        self.openai_model = 'gpt-5.1'
-        self.grok_model = 'grok-4-1-fast-reasoning'
-        
-        # Image generation провайдер
-        self.image_provider = None
-        
-        # Wavespeed настройки (ключ уже загружен из config.json)
-        self.wavespeed_size = '2880*4096'
-        self.wavespeed_model = ''
-        self.wavespeed_resolution = '1k'
-        self.wavespeed_output_format = 'png'
-        
-        # Промпт шаблон
-        self.prompt_template = 'bulk'
-        
-        # LoRA captions настройки
-        self.trigger_name = ''
-        self.generate_captions = False
-        self.caption_provider = 'openai'  # Провайдер для captions: 'openai' или 'grok'
-        self.openai_caption_model = 'gpt-5.1'  # Модель OpenAI для генерации captions
-        self.grok_caption_model = 'grok-4-1-fast-reasoning'  # Модель Grok для генерации captions
-        
-        # Настройки для NSFW и обычного контента
-        # Модели для промптов
-        self.ai_provider_nsfw = None  # Провайдер для NSFW промптов
-        self.ai_provider_normal = None  # Провайдер для обычных промптов
-        self.gemini_model_nsfw = 'gemini-2.5-flash'
-        self.gemini_model_normal = 'gemini-2.5-flash'
-        self.openai_model_nsfw = 'gpt-5.1'
-        self.openai_model_normal = 'gpt-5.1'
-        self.grok_model_nsfw = 'grok-4-1-fast-reasoning'
-        self.grok_model_normal = 'grok-4-1-fast-reasoning'
-        
-        # Модели для генерации изображений
-        self.wavespeed_model_nsfw = ''
-        self.wavespeed_model_normal = ''
-        
-        # Модели для captions
-        self.caption_provider_nsfw = 'openai'
-        self.caption_provider_normal = 'openai'
-        self.openai_caption_model_nsfw = 'gpt-5.1'
-        self.openai_caption_model_normal = 'gpt-5.1'
-        self.grok_caption_model_nsfw = 'grok-4-1-fast-reasoning'
-        self.grok_caption_model_normal = 'grok-4-1-fast-reasoning'
-        
-        # Флаг включения NSFW контента
-        self.nsfw_enabled = False  # По умолчанию NSFW отключен
+        for attr, default in self._PROFILE_SCHEMA:
+            setattr(self, attr, default)
     
     def load_from_profile(self, profile_name: str):
         """Загружает настройки из профиля"""
-        profile_path = self.profiles_dir / f"{profile_name}.json"
-        if not profile_path.exists():
-            raise FileNotFoundError(f"Профиль '{profile_name}' не найден")
-        
-        with open(profile_path, 'r', encoding='utf-8') as f:
-            profile = json.load(f)
+        profile = self._load_profile(profile_name)
         
         # Загружаем настройки из профиля
+        for attr, default in self._PROFILE_SCHEMA:
+            setattr(self, attr, profile.get(attr, default))
+        
         # API ключи из профиля переопределяют ключи из config.json (если указаны)
-        self.ai_provider = profile.get('ai_provider')
-        if profile.get('gemini_api_key'):
-            self.gemini_api_key = profile.get('gemini_api_key')
-        self.gemini_model = profile.get('gemini_model', 'gemini-2.5-flash')
-        if profile.get('openai_api_key'):
-            self.openai_api_key = profile.get('openai_api_key')
-        self.openai_model = profile.get('openai_model', 'gpt-5.1')
-        if profile.get('grok_api_key'):
-            self.grok_api_key = profile.get('grok_api_key')
-        self.grok_model = profile.get('grok_model', 'grok-4-1-fast-reasoning')
-        self.image_provider = profile.get('image_provider')
-        if profile.get('wavespeed_api_key'):
-            self.wavespeed_api_key = profile.get('wavespeed_api_key')
-        self.wavespeed_size = profile.get('wavespeed_size', '2880*4096')
-        self.wavespeed_model = profile.get('wavespeed_model', '')
-        self.wavespeed_resolution = profile.get('wavespeed_resolution', '1k')
-        self.wavespeed_output_format = profile.get('wavespeed_output_format', 'png')
-        self.prompt_template = profile.get('prompt_template', 'bulk')
-        self.trigger_name = profile.get('trigger_name', '')
-        self.generate_captions = profile.get('generate_captions', False)
-        self.caption_provider = profile.get('caption_provider', 'openai')
-        self.openai_caption_model = profile.get('openai_caption_model', 'gpt-5.1')
-        self.grok_caption_model = profile.get('grok_caption_model', 'grok-4-1-fast-reasoning')
-        
-        # Настройки для NSFW и обычного контента
-        self.ai_provider_nsfw = profile.get('ai_provider_nsfw')
-        self.ai_provider_normal = profile.get('ai_provider_normal')
-        self.gemini_model_nsfw = profile.get('gemini_model_nsfw', 'gemini-2.5-flash')
-        self.gemini_model_normal = profile.get('gemini_model_normal', 'gemini-2.5-flash')
-        self.openai_model_nsfw = profile.get('openai_model_nsfw', 'gpt-5.1')
-        self.openai_model_normal = profile.get('openai_model_normal', 'gpt-5.1')
-        self.grok_model_nsfw = profile.get('grok_model_nsfw', 'grok-4-1-fast-reasoning')
-        self.grok_model_normal = profile.get('grok_model_normal', 'grok-4-1-fast-reasoning')
-        self.wavespeed_model_nsfw = profile.get('wavespeed_model_nsfw', '')
-        self.wavespeed_model_normal = profile.get('wavespeed_model_normal', '')
-        self.caption_provider_nsfw = profile.get('caption_provider_nsfw', 'openai')
-        self.caption_provider_normal = profile.get('caption_provider_normal', 'openai')
-        self.openai_caption_model_nsfw = profile.get('openai_caption_model_nsfw', 'gpt-5.1')
-        self.openai_caption_model_normal = profile.get('openai_caption_model_normal', 'gpt-5.1')
-        self.grok_caption_model_nsfw = profile.get('grok_caption_model_nsfw', 'grok-4-1-fast-reasoning')
-        self.grok_caption_model_normal = profile.get('grok_caption_model_normal', 'grok-4-1-fast-reasoning')
-        
-        # Флаг включения NSFW контента
-        self.nsfw_enabled = profile.get('nsfw_enabled', False)
+        for provider in ('gemini', 'openai', 'grok', 'wavespeed'):
+            api_key = profile.get(f'{provider}_api_key')
+            if api_key:
+                setattr(self, f'{provider}_api_key', api_key)
         
         # Лимиты из профиля (если указаны)
         if profile.get('limit_ref_images'):
@@ -172,87 +336,155 @@ class Config:
         """Сохраняет текущие настройки в профиль (без API ключей, они в config.json)"""
         profile_path = self.profiles_dir / f"{profile_name}.json"
         
+        _now = datetime.now().isoformat()
+        
         # Проверяем, существует ли профиль
-        created_at = None
+        created_at = _now
+        existing = None
         if profile_path.exists():
             try:
-                with open(profile_path, 'r', encoding='utf-8') as f:
-                    existing = json.load(f)
-                    created_at = existing.get('created_at', datetime.now().isoformat())
-            except:
-                created_at = datetime.now().isoformat()
-        else:
-            created_at = datetime.now().isoformat()
+                existing = _loads(profile_path.read_bytes())
+                created_at = existing.get('created_at', _now)
+            except (OSError, ValueError, AttributeError):
+                existing = None
         
         # Сохраняем только выбор провайдеров/моделей, не API ключи
         # (ключи хранятся в config.json)
+        # (одно выражение словаря; распаковка ** вместо | - совместимо с Python 3.8)
         profile_data = {
-            'name': profile_name,
-            'description': description,
-            'created_at': created_at,
-            'updated_at': datetime.now().isoformat(),
-            'ai_provider': self.ai_provider,
-            'gemini_model': self.gemini_model,
-            'openai_model': self.openai_model,
-            'grok_model': self.grok_model,
-            'image_provider': self.image_provider,
-            'wavespeed_size': self.wavespeed_size,
-            'wavespeed_model': self.wavespeed_model,
-            'wavespeed_resolution': self.wavespeed_resolution,
-            'wavespeed_output_format': self.wavespeed_output_format,
-            'prompt_template': self.prompt_template,
-            'trigger_name': self.trigger_name,
-            'generate_captions': self.generate_captions,
-            'caption_provider': self.caption_provider,
-            'openai_caption_model': self.openai_caption_model,
-            'grok_caption_model': self.grok_caption_model,
-            'ai_provider_nsfw': self.ai_provider_nsfw,
-            'ai_provider_normal': self.ai_provider_normal,
-            'gemini_model_nsfw': self.gemini_model_nsfw,
-            'gemini_model_normal': self.gemini_model_normal,
-            'openai_model_nsfw': self.openai_model_nsfw,
-            'openai_model_normal': self.openai_model_normal,
-            'grok_model_nsfw': self.grok_model_nsfw,
-            'grok_model_normal': self.grok_model_normal,
-            'wavespeed_model_nsfw': self.wavespeed_model_nsfw,
-            'wavespeed_model_normal': self.wavespeed_model_normal,
-            'caption_provider_nsfw': self.caption_provider_nsfw,
-            'caption_provider_normal': self.caption_provider_normal,
-            'openai_caption_model_nsfw': self.openai_caption_model_nsfw,
-            'openai_caption_model_normal': self.openai_caption_model_normal,
-            'grok_caption_model_nsfw': self.grok_caption_model_nsfw,
-            'grok_caption_model_normal': self.grok_caption_model_normal,
-            'nsfw_enabled': self.nsfw_enabled,
+            'name': profile_name, 'description': description,
+            'created_at': created_at, 'updated_at': _now,
+            **{attr: getattr(self, attr) for attr, _ in self._PROFILE_SCHEMA},
             'limit_ref_images': self.limit_ref_images,
             'limit_sample_images': self.limit_sample_images,
-            '_note': 'API ключи хранятся в config.json и не сохраняются в профилях'
+            '_note': _NOTE,
         }
         
-        with open(profile_path, 'w', encoding='utf-8') as f:
-            json.dump(profile_data, f, indent=2, ensure_ascii=False)
+        # Если настройки не изменились, не перезаписываем файл
+        if isinstance(existing, dict):
+            unchanged = {k: v for k, v in existing.items() if k != 'updated_at'}
+            if unchanged == {k: v for k, v in profile_data.items() if k != 'updated_at'}:
+                return profile_path
+        
+        # Атомарная запись: временный файл + os.replace (без полузаписанных профилей)
+        tmp_path = profile_path.with_suffix('.json.tmp')
+        payload = _dumps(profile_data)
+        _ensure_profiles_dir(self.profiles_dir)
+        try:
+            self._write_atomic(tmp_path, payload)
+        except FileNotFoundError:
+            # Папку профилей удалили во время работы - создаем заново
+            self.profiles_dir.mkdir(exist_ok=True)
+            self._write_atomic(tmp_path, payload)
+        os.replace(tmp_path, profile_path)
+        
+        # Сразу прогреваем кэш list_profiles свежими данными
+        st = profile_path.stat()
+        _cache_profile(os.fspath(profile_path), (st.st_mtime_ns, st.st_size), profile_data)
         
         return profile_path
     
+    @staticmethod
+    def _write_atomic(tmp_path: Path, payload: bytes):
+        """Записывает данные во временный файл и сбрасывает их на диск"""
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+    
+    def profile_exists(self, profile_name: str) -> bool:
+        """Есть ли сохраненный профиль с таким именем файла (без чтения остальных профилей)"""
+        return (self.profiles_dir / f"{profile_name}.json").is_file()
+    
     def list_profiles(self) -> List[Dict]:
         """Возвращает список всех сохраненных профилей"""
         profiles = []
-        if not self.profiles_dir.exists():
+        
+        # scandir отдает тип файла вместе с именем, без лишних stat на каждый элемент;
+        # в цикле сканирования работаем со строковыми путями, без объектов Path
+        profiles_dir = os.fspath(self.profiles_dir)
+        try:
+            with os.scandir(profiles_dir) as it:
+                entries = [e for e in it if e.name.endswith('.json') and e.is_file()]
+        except FileNotFoundError:
+            # Ни одного профиля еще не сохраняли - папки нет
             return profiles
         
-        for profile_file in self.profiles_dir.glob("*.json"):
+        seen = set()
+        parsed = []
+        misses = []
+        for entry in entries:
+            profile_file = entry.path
             try:
-                with open(profile_file, 'r', encoding='utf-8') as f:
-                    profile = json.load(f)
-                profiles.append({
-                    'name': profile.get('name', profile_file.stem),
-                    'description': profile.get('description', ''),
-                    'file': profile_file.stem
-                })
-            except:
+                st = entry.stat()
+            except OSError:
                 continue
+            stamp = (st.st_mtime_ns, st.st_size)
+            seen.add(profile_file)
+            cached = _PROFILE_PARSE_CACHE.get(profile_file)
+            if cached and cached[:2] == stamp:
+                _PROFILE_PARSE_CACHE.move_to_end(profile_file)
+                parsed.append((entry.name, cached[2]))
+            else:
+                misses.append((entry.name, profile_file, stamp))
+        
+        # Профили - небольшие файлы: разбор JSON держит GIL, поэтому читаем последовательно
+        for name, profile_file, stamp in misses:
+            profile = _read_profile_file(profile_file)
+            if profile is not None:
+                _cache_profile(profile_file, stamp, profile)
+                parsed.append((name, profile))
+        
+        for name, profile in parsed:
+            stem = name[:-len('.json')]
+            profiles.append({
+                'name': profile.get('name', stem),
+                'description': profile.get('description', ''),
+                'file': stem
+            })
+        
+        # Удаляем из кэша профили, которых больше нет на диске
+        for cached_path in [p for p in _PROFILE_PARSE_CACHE if os.path.dirname(p) == profiles_dir and p not in seen]:
+            del _PROFILE_PARSE_CACHE[cached_path]
         
         return sorted(profiles, key=lambda x: x['name'])
     
+    def effective_for(self, content_type: Optional[str]) -> EffectiveSettings:
+        """Настройки для типа контента: отдельные настройки 'nsfw'/'normal' поверх основных"""
+        values = {attr: getattr(self, attr) for attr in _EFFECTIVE_FIELDS}
+        overridden = False
+        if content_type in ('nsfw', 'normal'):
+            suffix = f"_{content_type}"
+            ai_provider = getattr(self, f"ai_provider{suffix}")
+            if ai_provider:
+                values['ai_provider'] = ai_provider
+                if ai_provider in ('gemini', 'openai', 'grok'):
+                    values[f"{ai_provider}_model"] = getattr(self, f"{ai_provider}_model{suffix}")
+                overridden = True
+            wavespeed_model = getattr(self, f"wavespeed_model{suffix}")
+            if wavespeed_model:
+                values['wavespeed_model'] = wavespeed_model
+                overridden = True
+            caption_provider = getattr(self, f"caption_provider{suffix}")
+            if caption_provider:
+                values['caption_provider'] = caption_provider
+                if caption_provider in ('openai', 'grok'):
+                    values[f"{caption_provider}_caption_model"] = getattr(self, f"{caption_provider}_caption_model{suffix}")
+                overridden = True
+        return EffectiveSettings(overridden=overridden, **values)
+    
+    @property
+    def is_video_model(self) -> bool:
+        """Выбранная модель Wavespeed генерирует видео"""
+        return _is_video_model(self.wavespeed_model)
+    
+    def with_settings(self, settings: EffectiveSettings) -> 'Config':
+        """Копия конфигурации с примененными настройками (исходный объект не меняется)"""
+        config = copy.copy(self)
+        for attr in _EFFECTIVE_FIELDS:
+            setattr(config, attr, getattr(settings, attr))
+        return config
+    
     def get_minimal_config(self) -> Dict:
         """Возвращает минимальную конфигурацию (пути и API ключи)"""
         return {
@@ -269,8 +501,7 @@ class Config:
     
     def save_base_config(self, config: Dict):
         """Сохраняет базовую конфигурацию (только пути)"""
-        with open(self.config_file, 'w', encoding='utf-8') as f:
-            json.dump(config, f, indent=2, ensure_ascii=False)
+        Path(self.config_file).write_bytes(_dumps(config))
     
     def to_dict(self) -> Dict:
         """Преобразует конфигурацию в словарь для сохранения"""
@@ -293,3 +524,16 @@ class Config:
             'limit_sample_images': self.limit_sample_images
         }
 
+
+# Папка профилей создается при первом сохранении, один раз на процесс (не при импорте
+# и не в каждом Config()); если ее удалят позже, save_to_profile создаст ее заново
+_PROFILES_DIR = Path(Config.PROFILES_DIR)
+_profiles_dir_created = False
+
+
+def _ensure_profiles_dir(profiles_dir: Path):
+    """Создает папку профилей при первом вызове за процесс"""
+    global _profiles_dir_created
+    if not _profiles_dir_created:
+        profiles_dir.mkdir(exist_ok=True)
+        _profiles_dir_created = True
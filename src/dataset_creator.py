@@ -1,12 +1,29 @@
 """Основной класс для создания датасета"""
 
 import os
-import shutil
-import zipfile
+import logging
+import importlib.util
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import TYPE_CHECKING, List, Dict, Optional, Tuple
 from datetime import datetime
 
+try:
+    # SIMD реализация base64 (опционально), API совместим со стандартным модулем
+    import pybase64 as base64
+    PYBASE64_AVAILABLE = True
+except ImportError:
+    import base64
+    PYBASE64_AVAILABLE = False
+
+# Автодополнение номера при выборе изображения (на Windows readline может отсутствовать).
+# Сам модуль импортируется только в _select_sample_image: импорт readline меняет поведение
+# всех input() в процессе, поэтому не делаем этого при импорте модуля
+READLINE_AVAILABLE = importlib.util.find_spec('readline') is not None
+
 try:
     from i18n import get_i18n
     I18N_AVAILABLE = True
@@ -18,11 +35,56 @@ except ImportError:
                 return key
         return SimpleI18n()
 
-from .config import Config
+from .config import Config, EffectiveSettings
 from .file_manager import LocalFileManager
 from .prompt_generator import PromptGenerator
 from .image_generator import ImageGenerator
-from .caption_generator import CaptionGenerator
+
+# CaptionGenerator, zipfile и shutil нужны только при генерации captions -
+# импортируются по месту использования, чтобы не замедлять запуск
+if TYPE_CHECKING:
+    from .caption_generator import CaptionGenerator
+
+# Сообщения о ходе обработки каждого sample (в режиме --quiet не форматируются)
+log = logging.getLogger(__name__)
+
+# Сколько готовых промптов может ждать генерации изображения
+_HANDOFF_QUEUE_SIZE = 8
+
+# Максимум одновременных запросов к API подписей (ограничение по rate limit)
+_CAPTION_WORKERS = 8
+
+# Префикс временных файлов LoRA датасета до присвоения финального номера
+_PENDING_PREFIX = '.pending_'
+
+
+@dataclass
+class GeneratedImage:
+    """Сгенерированное изображение для создания captions"""
+    # Явные __slots__ (dataclass(slots=True) требует Python 3.10)
+    __slots__ = ('path', 'original_name', 'index', 'caption_generator')
+    path: str
+    original_name: str
+    index: int  # Номер в LoRA датасете: 1 для _0001, 2 для _0002 и т.д.
+    caption_generator: Optional['CaptionGenerator']
+
+
+def _write_text(path, text: str, exclusive: bool = False):
+    """Записывает текст одним os.write (exclusive=True - только если файла еще нет)"""
+    flags = os.O_WRONLY | os.O_CREAT | getattr(os, 'O_BINARY', 0)
+    flags |= os.O_EXCL if exclusive else os.O_TRUNC
+    data = memoryview(text.encode('utf-8'))
+    fd = os.open(path, flags, 0o644)
+    try:
+        while data:
+            data = data[os.write(fd, data):]
+    finally:
+        os.close(fd)
+
+
+def _stem(file_name: str) -> str:
+    """Имя файла без расширения (как Path.stem, но без создания Path)"""
+    return file_name.rpartition('.')[0] or file_name
 
 
 class DatasetCreator:
@@ -35,51 +97,117 @@ class DatasetCreator:
         self.image_generator = ImageGenerator(config)
         
         # Инициализируем генератор подписей только если нужно
+        # (экземпляры кэшируются по провайдеру и моделям captions)
         self.caption_generator = None
+        self._caption_cache: Dict[tuple, 'CaptionGenerator'] = {}
         if self.config.generate_captions and self.config.trigger_name:
             try:
+                from .caption_generator import CaptionGenerator
                 self.caption_generator = CaptionGenerator(config)
+                self._caption_cache[self._caption_key(config)] = self.caption_generator
             except Exception as e:
                 i18n = get_i18n()
                 print(f"   ⚠️  {i18n.t('caption_generation_skipped_error', error=e)}")
                 print(f"   {i18n.t('caption_generation_skipped')}")
         
         # Создаем выходную папку
-        Path(self.config.output_folder).mkdir(parents=True, exist_ok=True)
+        # (пути вычисляются один раз, а не для каждого sample)
+        self._output_dir = Path(self.config.output_folder)
+        self._output_dir.mkdir(parents=True, exist_ok=True)
+        self._lora_dir = self._output_dir / "lora_dataset"
         
         # Список сгенерированных изображений для создания captions
-        self.generated_images = []
+        self.generated_images: List[GeneratedImage] = []
+        
+        # Генераторы по наборам настроек (основные настройки уже готовы)
+        self._lock = threading.Lock()
+        self._generator_cache: Dict[EffectiveSettings, Tuple] = {
+            config.effective_for(None): (self.prompt_generator, self.image_generator, self.caption_generator)
+        }
+        
+        # Пути, выданные _get_unique_file_path, но еще не записанные на диск
+        self._reserved_paths = set()
+        self._run_ts = None
+    
+    @staticmethod
+    def _caption_key(settings: Config) -> tuple:
+        """Ключ настроек, от которых зависит CaptionGenerator"""
+        return (settings.caption_provider, settings.openai_caption_model, settings.grok_caption_model)
     
     def _get_unique_file_path(self, base_path: str) -> str:
-        """Генерирует уникальное имя файла, добавляя timestamp если файл уже существует"""
-        path = Path(base_path)
-        output_dir = path.parent
-        stem = path.stem
-        suffix = path.suffix
-        
-        # Если файл не существует, возвращаем исходный путь
-        if not path.exists():
-            return str(path)
-        
-        # Если файл существует, добавляем timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        unique_path = output_dir / f"{stem}_{timestamp}{suffix}"
-        
-        # Если и с timestamp файл существует (маловероятно, но на всякий случай), добавляем счетчик
-        counter = 1
-        while unique_path.exists():
-            unique_path = output_dir / f"{stem}_{timestamp}_{counter}{suffix}"
-            counter += 1
-        
-        return str(unique_path)
+        """Генерирует уникальное имя файла, добавляя timestamp если файл уже существует
+        
+        Выданный путь резервируется: параллельные задачи не получат одно и то же имя.
+        """
+        def taken(candidate: str) -> bool:
+            return candidate in self._reserved_paths or os.path.lexists(candidate)
+        
+        with self._lock:
+            # Если файл не существует, возвращаем исходный путь
+            unique_path = base_path
+            if taken(unique_path):
+                # Если файл существует, добавляем timestamp (один на весь запуск)
+                if self._run_ts is None:
+                    self._run_ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+                root, ext = os.path.splitext(base_path)
+                unique_path = f"{root}_{self._run_ts}{ext}"
+                
+                # Если и с timestamp файл существует, добавляем счетчик
+                counter = 1
+                while taken(unique_path):
+                    unique_path = f"{root}_{self._run_ts}_{counter}{ext}"
+                    counter += 1
+            
+            self._reserved_paths.add(unique_path)
+        return unique_path
+    
+    def _list_sample_files(self) -> List[Dict]:
+        """Проверяет папки с образцами и возвращает список изображений до лимита.
+        
+        Общая часть для режимов detailed и bulk: в detailed результат
+        используется для интерактивного выбора, в bulk обрабатывается целиком.
+        """
+        i18n = get_i18n()
+        limit = self.config.limit_sample_images
+        detailed = self.config.prompt_template == 'detailed'
+        if detailed:
+            print(f"   {i18n.t('mode_detailed')}")
+            print(f"   {i18n.t('mode_detailed_corresponds')}")
+        else:
+            print(f"   {i18n.t('mode_bulk', limit=limit)}")
+            print(f"   {i18n.t('mode_bulk_corresponds', limit=limit)}")
+        
+        # Проверяем наличие файлов в подпапках
+        sample_folder = Path(self.config.sample_dataset_folder)
+        normal_folder = sample_folder / 'normal'
+        if normal_folder.is_dir() and self.file_manager.count_image_files(normal_folder) == 0:
+            print(f"   ℹ️  {i18n.t('folder_normal_empty')}")
+        
+        if self.config.nsfw_enabled:
+            nsfw_folder = sample_folder / 'nsfw'
+            if nsfw_folder.is_dir() and self.file_manager.count_image_files(nsfw_folder) == 0:
+                print(f"   ℹ️  {i18n.t('folder_nsfw_empty')}")
+        
+        sample_files = self.file_manager.list_image_files(
+            self.config.sample_dataset_folder,
+            limit,
+            include_nsfw=self.config.nsfw_enabled,
+            stat_workers=self.config.stat_workers
+        )
+        key = 'found_sample_images' if detailed else 'found_sample_images_for_processing'
+        print(f"   {i18n.t(key, count=len(sample_files))}")
+        return sample_files
     
     def process_dataset(self):
         """Обрабатывает весь датасет"""
+        # Метка времени для имен-дубликатов вычисляется один раз на запуск
+        self._run_ts = datetime.now().strftime("%Y%m%d_%H%M%S")
         i18n = get_i18n()
         print(f"📁 {i18n.t('loading_ref_images')}")
         ref_files = self.file_manager.list_image_files(
             self.config.influencer_ref_folder,
-            self.config.limit_ref_images
+            self.config.limit_ref_images,
+            stat_workers=self.config.stat_workers
         )
         print(f"   {i18n.t('found_ref_images', count=len(ref_files))}")
         
@@ -87,76 +215,17 @@ class DatasetCreator:
         # Логика зависит от шаблона промпта (соответствует оригинальным Make.com workflow):
         # - bulk: использует listAllFilesSubfoldersInFolder с limit=10 → обрабатывает МНОГО изображений
         # - detailed: использует getFile с конкретным файлом → обрабатывает ОДНО изображение
-        if self.config.prompt_template == 'detailed':
-            # Для detailed загружаем все изображения для выбора
-            limit = self.config.limit_sample_images
-            print(f"   {i18n.t('mode_detailed')}")
-            print(f"   {i18n.t('mode_detailed_corresponds')}")
-            
-            # Проверяем наличие файлов в подпапках
-            sample_folder = Path(self.config.sample_dataset_folder)
-            normal_folder = sample_folder / 'normal'
-            
-            if normal_folder.exists() and normal_folder.is_dir():
-                normal_files = list(normal_folder.glob('*.{jpg,jpeg,png,gif,bmp,webp}'))
-                normal_files = [f for f in normal_files if f.is_file()]
-                if len(normal_files) == 0:
-                    print(f"   ℹ️  {i18n.t('folder_normal_empty')}")
-            
-            if self.config.nsfw_enabled:
-                nsfw_folder = sample_folder / 'nsfw'
-                if nsfw_folder.exists() and nsfw_folder.is_dir():
-                    nsfw_files = list(nsfw_folder.glob('*.{jpg,jpeg,png,gif,bmp,webp}'))
-                    nsfw_files = [f for f in nsfw_files if f.is_file()]
-                    if len(nsfw_files) == 0:
-                        print(f"   ℹ️  {i18n.t('folder_nsfw_empty')}")
-            
-            # Загружаем все доступные изображения для выбора
-            all_sample_files = self.file_manager.list_image_files(
-                self.config.sample_dataset_folder,
-                limit,
-                include_nsfw=self.config.nsfw_enabled
-            )
-            print(f"   {i18n.t('found_sample_images', count=len(all_sample_files))}")
-            
+        detailed = self.config.prompt_template == 'detailed'
+        sample_files = self._list_sample_files()
+        if detailed:
             # Интерактивный выбор изображения
-            selected_file = self._select_sample_image(all_sample_files)
+            selected_file = self._select_sample_image(sample_files)
             if not selected_file:
                 print(f"   ⚠️  {i18n.t('image_not_selected')}")
                 return
             
             sample_files = [selected_file]
             print(f"   ✓ {i18n.t('image_selected', name=selected_file['name'])}")
-        else:
-            # Для bulk обрабатываем все изображения до лимита (как в оригинальном workflow)
-            limit = self.config.limit_sample_images
-            print(f"   {i18n.t('mode_bulk', limit=limit)}")
-            print(f"   {i18n.t('mode_bulk_corresponds', limit=limit)}")
-            
-            # Проверяем наличие файлов в подпапках
-            sample_folder = Path(self.config.sample_dataset_folder)
-            normal_folder = sample_folder / 'normal'
-            
-            if normal_folder.exists() and normal_folder.is_dir():
-                normal_files = list(normal_folder.glob('*.{jpg,jpeg,png,gif,bmp,webp}'))
-                normal_files = [f for f in normal_files if f.is_file()]
-                if len(normal_files) == 0:
-                    print(f"   ℹ️  {i18n.t('folder_normal_empty')}")
-            
-            if self.config.nsfw_enabled:
-                nsfw_folder = sample_folder / 'nsfw'
-                if nsfw_folder.exists() and nsfw_folder.is_dir():
-                    nsfw_files = list(nsfw_folder.glob('*.{jpg,jpeg,png,gif,bmp,webp}'))
-                    nsfw_files = [f for f in nsfw_files if f.is_file()]
-                    if len(nsfw_files) == 0:
-                        print(f"   ℹ️  {i18n.t('folder_nsfw_empty')}")
-            
-            sample_files = self.file_manager.list_image_files(
-                self.config.sample_dataset_folder,
-                limit,
-                include_nsfw=self.config.nsfw_enabled
-            )
-            print(f"   {i18n.t('found_sample_images_for_processing', count=len(sample_files))}")
         
         # Загружаем референсные изображения
         ref_images_data = []
@@ -165,185 +234,36 @@ class DatasetCreator:
             ref_images_data.append(data)
             print(f"   ✓ {ref_file['name']}")
         
-        # Обрабатываем каждое sample изображение
+        # Кодируем референсы в base64 один раз на весь прогон, а не для каждого sample
+        ref_images_b64 = [base64.b64encode(data).decode('ascii') for data in ref_images_data]
+        
+        # Определяем тип контента и отбрасываем NSFW файлы, если NSFW отключен
+        total = len(sample_files)
+        tasks = []
         for idx, sample_file in enumerate(sample_files, 1):
-            print(f"\n🖼️  {i18n.t('processing_image', current=idx, total=len(sample_files), name=sample_file['name'])}")
-            
-            try:
-                # Определяем тип контента по пути файла
-                content_type = sample_file.get('content_type')
-                if not content_type:
-                    # Определяем по пути
-                    file_path = sample_file.get('path', '')
-                    if 'nsfw' in file_path.lower():
-                        content_type = 'nsfw'
-                    elif 'normal' in file_path.lower():
-                        content_type = 'normal'
-                
-                # Если NSFW отключен, пропускаем NSFW файлы
-                if content_type == 'nsfw' and not self.config.nsfw_enabled:
-                    print(f"   ⏭️  {i18n.t('skipped_nsfw_disabled')}")
-                    continue
-                
-                # Сохраняем текущие настройки
-                original_ai_provider = self.config.ai_provider
-                original_gemini_model = self.config.gemini_model
-                original_openai_model = self.config.openai_model
-                original_grok_model = self.config.grok_model
-                original_wavespeed_model = self.config.wavespeed_model
-                original_caption_provider = self.config.caption_provider
-                original_openai_caption_model = self.config.openai_caption_model
-                original_grok_caption_model = self.config.grok_caption_model
-                
-                # Применяем настройки для типа контента
-                settings_applied = False
-                if content_type == 'nsfw':
-                    if self.config.ai_provider_nsfw:
-                        self.config.ai_provider = self.config.ai_provider_nsfw
-                        if self.config.ai_provider_nsfw == 'gemini':
-                            self.config.gemini_model = self.config.gemini_model_nsfw
-                        elif self.config.ai_provider_nsfw == 'openai':
-                            self.config.openai_model = self.config.openai_model_nsfw
-                        elif self.config.ai_provider_nsfw == 'grok':
-                            self.config.grok_model = self.config.grok_model_nsfw
-                        settings_applied = True
-                    if self.config.wavespeed_model_nsfw:
-                        self.config.wavespeed_model = self.config.wavespeed_model_nsfw
-                        settings_applied = True
-                    if self.config.caption_provider_nsfw:
-                        self.config.caption_provider = self.config.caption_provider_nsfw
-                        if self.config.caption_provider_nsfw == 'openai':
-                            self.config.openai_caption_model = self.config.openai_caption_model_nsfw
-                        elif self.config.caption_provider_nsfw == 'grok':
-                            self.config.grok_caption_model = self.config.grok_caption_model_nsfw
-                        settings_applied = True
-                    if settings_applied:
-                        print(f"   📌 {i18n.t('using_nsfw_settings')}")
-                    else:
-                        print(f"   📌 {i18n.t('using_main_settings_nsfw_not_set')}")
-                elif content_type == 'normal':
-                    if self.config.ai_provider_normal:
-                        self.config.ai_provider = self.config.ai_provider_normal
-                        if self.config.ai_provider_normal == 'gemini':
-                            self.config.gemini_model = self.config.gemini_model_normal
-                        elif self.config.ai_provider_normal == 'openai':
-                            self.config.openai_model = self.config.openai_model_normal
-                        elif self.config.ai_provider_normal == 'grok':
-                            self.config.grok_model = self.config.grok_model_normal
-                        settings_applied = True
-                    if self.config.wavespeed_model_normal:
-                        self.config.wavespeed_model = self.config.wavespeed_model_normal
-                        settings_applied = True
-                    if self.config.caption_provider_normal:
-                        self.config.caption_provider = self.config.caption_provider_normal
-                        if self.config.caption_provider_normal == 'openai':
-                            self.config.openai_caption_model = self.config.openai_caption_model_normal
-                        elif self.config.caption_provider_normal == 'grok':
-                            self.config.grok_caption_model = self.config.grok_caption_model_normal
-                        settings_applied = True
-                    if settings_applied:
-                        print(f"   📌 {i18n.t('using_normal_settings')}")
-                    else:
-                        print(f"   📌 {i18n.t('using_main_settings_normal_not_set')}")
-                else:
-                    # Если content_type не определен, используем основные настройки
-                    print(f"   📌 {i18n.t('using_main_settings')}")
-                
-                # Обновляем генераторы с новыми настройками
-                self.prompt_generator.config = self.config
-                self.prompt_generator.setup_provider()  # Переинициализируем провайдер
-                self.image_generator.config = self.config
-                if self.caption_generator:
-                    self.caption_generator.config = self.config
-                    # Переинициализируем caption generator если провайдер изменился
-                    try:
-                        self.caption_generator = CaptionGenerator(self.config)
-                    except Exception:
-                        pass  # Оставляем старый если не удалось создать новый
-                
-                # Читаем sample изображение
-                sample_data, sample_name = self.file_manager.read_file(sample_file['path'])
-                
-                # Генерируем промпт
-                print(f"   🤖 {i18n.t('generating_prompt')}")
-                prompt = self.prompt_generator.generate_prompt(ref_images_data, sample_data)
-                print(f"   ✓ {i18n.t('prompt_generated', length=len(prompt))}")
-                
-                # Сохраняем промпт (с уникальным именем)
-                base_prompt_path = os.path.join(
-                    self.config.output_folder,
-                    f"{Path(sample_name).stem}_prompt.txt"
-                )
-                prompt_path = self._get_unique_file_path(base_prompt_path)
-                with open(prompt_path, 'w', encoding='utf-8') as f:
-                    f.write(prompt)
-                
-                # Определяем тип вывода (изображение или видео)
-                is_video = False
-                if self.config.image_provider == 'wavespeed':
-                    is_video = ('image-to-video' in self.config.wavespeed_model or 
-                               '/video' in self.config.wavespeed_model or
-                               'video' in self.config.wavespeed_model.lower())
-                output_type = "видео" if is_video else "изображения"
-                default_ext = "mp4" if is_video else "png"
-                
-                # Генерируем изображение/видео
-                model_name = self.config.wavespeed_model
-                print(f"   🎨 {i18n.t('generating_image', provider=self.config.image_provider, model=model_name)}")
-                
-                # Определяем путь для сохранения
-                if self.config.generate_captions and self.config.trigger_name and not is_video:
-                    # Если включена генерация captions, используем формат trigger_name_0001.png
-                    img_index = len(self.generated_images) + 1
-                    lora_dir = Path(self.config.output_folder) / "lora_dataset"
-                    lora_dir.mkdir(exist_ok=True)
-                    output_path = lora_dir / f"{self.config.trigger_name}_{img_index:04d}.{default_ext}"
-                else:
-                    # Обычный формат с уникальным именем
-                    base_output_path = os.path.join(
-                        self.config.output_folder,
-                        f"{Path(sample_name).stem}_generated.{default_ext}"
-                    )
-                    output_path = self._get_unique_file_path(base_output_path)
-                
-                self.image_generator.generate_image(
-                    ref_images_data,
-                    sample_data,
-                    prompt,
-                    str(output_path)
-                )
-                if is_video:
-                    print(f"   ✓ {i18n.t('video_saved', path=output_path)}")
-                else:
-                    print(f"   ✓ {i18n.t('image_saved', path=output_path)}")
-                
-                # Сохраняем информацию о сгенерированном изображении для создания captions
-                if not is_video:  # Captions только для изображений, не для видео
-                    self.generated_images.append({
-                        'path': str(output_path),
-                        'original_name': sample_name,
-                        'index': len(self.generated_images) + 1  # Индекс начинается с 1 для _0001, _0002 и т.д.
-                    })
-
-                # Восстанавливаем оригинальные настройки для следующих итераций
-                self.config.ai_provider = original_ai_provider
-                self.config.gemini_model = original_gemini_model
-                self.config.openai_model = original_openai_model
-                self.config.grok_model = original_grok_model
-                self.config.wavespeed_model = original_wavespeed_model
-                self.config.caption_provider = original_caption_provider
-                self.config.openai_caption_model = original_openai_caption_model
-                self.config.grok_caption_model = original_grok_caption_model
-                
-            except Exception as e:
-                i18n = get_i18n()
-                error_str = str(e)
-                # Проверяем, является ли это ошибкой API после всех попыток
-                if 'Wavespeed API вернул ошибку' in error_str or 'all_attempts_failed' in error_str:
-                    print(f"   ⏭️  {i18n.t('skipping_image_after_errors', name=sample_file['name'], error=error_str[:150])}")
-                else:
-                    print(f"   ❌ {i18n.t('error_processing_image')}: {sample_file['name']}: {e}")
+            # Тип контента определяется при сканировании папок (LocalFileManager)
+            content_type = sample_file.get('content_type')
+            if content_type == 'nsfw' and not self.config.nsfw_enabled:
+                if log.isEnabledFor(logging.INFO):
+                    log.info("\n🖼️  %s", i18n.t('processing_image', current=idx, total=total, name=sample_file['name']))
+                    log.info("   ⏭️  %s", i18n.t('skipped_nsfw_disabled'))
                 continue
+            tasks.append((idx, sample_file, content_type))
+        
+        # Папка LoRA датасета создается один раз до запуска задач
+        if self.config.generate_captions and self.config.trigger_name:
+            self._lora_dir.mkdir(exist_ok=True)
+            # Остатки запуска, завершенного без очистки (например, убитого процесса)
+            self._remove_pending_files()
+        
+        # Обрабатываем sample изображения конвейером: промпты и изображения параллельно
+        try:
+            results = self._run_pipeline(tasks, total, ref_images_data, ref_images_b64)
+            self._collect_generated(results)
+        finally:
+            # После переименования остаются только временные файлы прерванного запуска
+            # или неудачных генераций - они не должны попасть в датасет и ZIP
+            self._remove_pending_files()
         
         # Генерируем captions если нужно
         if self.config.generate_captions and self.config.trigger_name and self.generated_images:
@@ -352,6 +272,255 @@ class DatasetCreator:
         
         print(f"\n✅ {i18n.t('processing_completed', path=self.config.output_folder)}")
     
+    # Сообщение о применяемых настройках: (тип контента, применены ли отдельные настройки)
+    _SETTINGS_MESSAGES = {
+        ('nsfw', True): 'using_nsfw_settings',
+        ('nsfw', False): 'using_main_settings_nsfw_not_set',
+        ('normal', True): 'using_normal_settings',
+        ('normal', False): 'using_main_settings_normal_not_set',
+    }
+    
+    def _generators_for(self, effective: EffectiveSettings) -> Tuple[PromptGenerator, ImageGenerator, Optional['CaptionGenerator']]:
+        """Генераторы для набора настроек (создаются один раз на набор и переиспользуются)"""
+        with self._lock:
+            generators = self._generator_cache.get(effective)
+            if generators is None:
+                settings = self.config.with_settings(effective)
+                caption_generator = None
+                if self.caption_generator:
+                    caption_key = self._caption_key(settings)
+                    caption_generator = self._caption_cache.get(caption_key)
+                    if caption_generator is None:
+                        try:
+                            from .caption_generator import CaptionGenerator
+                            caption_generator = CaptionGenerator(settings)
+                            self._caption_cache[caption_key] = caption_generator
+                        except Exception:
+                            caption_generator = self.caption_generator  # Используем основной, если не удалось создать
+                generators = (PromptGenerator(settings), ImageGenerator(settings), caption_generator)
+                self._generator_cache[effective] = generators
+        return generators
+    
+    def _run_pipeline(self, tasks: List[Tuple[int, Dict, Optional[str]]], total: int,
+                      ref_images_data: List[bytes], ref_images_b64: List[str]) -> List[Dict]:
+        """Двухэтапный конвейер: промпты (LLM) -> изображения (Wavespeed)
+        
+        Промпт для следующего sample генерируется, пока предыдущий ждет генерации изображения.
+        Этапы связаны ограниченной очередью, поэтому промпты не убегают далеко вперед.
+        """
+        handoff = queue.Queue(maxsize=_HANDOFF_QUEUE_SIZE)
+        image_slots = threading.BoundedSemaphore(self.config.image_workers)
+        cancelled = threading.Event()
+        
+        def prompt_task(task):
+            job = None
+            try:
+                if not cancelled.is_set():
+                    job = self._prepare_sample(task, total, ref_images_data, ref_images_b64)
+            finally:
+                # Передаем результат (или None при ошибке) - главный поток ждет ровно len(tasks) записей
+                while not cancelled.is_set():
+                    try:
+                        handoff.put(job, timeout=0.5)
+                        break
+                    except queue.Full:
+                        continue
+        
+        results = []
+        with ThreadPoolExecutor(max_workers=self.config.prompt_workers) as prompt_pool, \
+                ThreadPoolExecutor(max_workers=self.config.image_workers) as image_pool:
+            prompt_futures = []
+            image_futures = []
+            try:
+                for task in tasks:
+                    prompt_futures.append(prompt_pool.submit(prompt_task, task))
+                
+                for _ in range(len(tasks)):
+                    job = handoff.get()
+                    if job is None:
+                        continue
+                    image_slots.acquire()
+                    future = image_pool.submit(self._render_sample, job, ref_images_data, ref_images_b64)
+                    future.add_done_callback(lambda _: image_slots.release())
+                    image_futures.append(future)
+                
+                for future in as_completed(image_futures):
+                    record = future.result()
+                    if record:
+                        results.append(record)
+            except BaseException:
+                # Ctrl+C и т.п.: не запускаем новые задачи, ждем только уже выполняющиеся
+                # (отмена по одной задаче: shutdown(cancel_futures=...) нет в Python 3.8)
+                cancelled.set()
+                for future in prompt_futures + image_futures:
+                    future.cancel()
+                raise
+        
+        results.sort(key=lambda record: record['idx'])
+        return results
+    
+    def _prepare_sample(self, task: Tuple[int, Dict, Optional[str]], total: int,
+                        ref_images_data: List[bytes], ref_images_b64: List[str]) -> Optional[Dict]:
+        """Этап 1: настройки, чтение sample и генерация промпта"""
+        idx, sample_file, content_type = task
+        i18n = get_i18n()
+        if log.isEnabledFor(logging.INFO):
+            log.info("\n🖼️  %s", i18n.t('processing_image', current=idx, total=total, name=sample_file['name']))
+        
+        try:
+            effective = self.config.effective_for(content_type)
+            verbose = log.isEnabledFor(logging.INFO)
+            if verbose:
+                message_key = self._SETTINGS_MESSAGES.get((content_type, effective.overridden), 'using_main_settings')
+                log.info("   📌 %s", i18n.t(message_key))
+            prompt_generator, image_generator, caption_generator = self._generators_for(effective)
+            
+            # Читаем sample изображение
+            sample_data, sample_name = self.file_manager.read_file(sample_file['path'])
+            # base64 sample нужен и для промпта, и для запроса генерации - кодируем один раз
+            sample_b64 = base64.b64encode(sample_data).decode('ascii')
+            
+            # Генерируем промпт
+            if verbose:
+                log.info("   🤖 %s", i18n.t('generating_prompt'))
+            prompt = prompt_generator.generate_prompt(ref_images_data, sample_data, ref_b64=ref_images_b64,
+                                                      sample_b64=sample_b64)
+            if verbose:
+                log.info("   ✓ %s", i18n.t('prompt_generated', length=len(prompt)))
+            
+            # Сохраняем промпт (с уникальным именем)
+            base_prompt_path = os.path.join(
+                self.config.output_folder,
+                f"{_stem(sample_name)}_prompt.txt"
+            )
+            # O_EXCL: если файл успели создать извне, берем следующее свободное имя
+            while True:
+                prompt_path = self._get_unique_file_path(base_prompt_path)
+                try:
+                    _write_text(prompt_path, prompt, exclusive=True)
+                    break
+                except FileExistsError:
+                    continue
+        except Exception as e:
+            self._report_sample_error(sample_file, e)
+            return None
+        
+        return {
+            'idx': idx,
+            'sample_file': sample_file,
+            'settings': effective,
+            'sample_data': sample_data,
+            'sample_b64': sample_b64,
+            'sample_name': sample_name,
+            'prompt': prompt,
+            'image_generator': image_generator,
+            'caption_generator': caption_generator,
+        }
+    
+    def _render_sample(self, job: Dict, ref_images_data: List[bytes], ref_images_b64: List[str]) -> Optional[Dict]:
+        """Этап 2: генерация изображения/видео по готовому промпту"""
+        i18n = get_i18n()
+        effective = job['settings']
+        sample_name = job['sample_name']
+        
+        try:
+            # Определяем тип вывода (изображение или видео)
+            is_video = self.config.image_provider == 'wavespeed' and effective.is_video_model
+            default_ext = "mp4" if is_video else "png"
+            
+            # Генерируем изображение/видео
+            verbose = log.isEnabledFor(logging.INFO)
+            if verbose:
+                log.info("   🎨 %s", i18n.t('generating_image', provider=self.config.image_provider,
+                                               model=effective.wavespeed_model))
+            
+            # Определяем путь для сохранения
+            pending = self.config.generate_captions and self.config.trigger_name and not is_video
+            if pending:
+                # Для LoRA датасета финальный номер trigger_name_0001.png присваивается после
+                # завершения всех задач (по порядку sample), пока пишем во временный файл
+                output_path = self._lora_dir / f"{_PENDING_PREFIX}{self.config.trigger_name}_{job['idx']:04d}.{default_ext}"
+            else:
+                # Обычный формат с уникальным именем
+                base_output_path = os.path.join(
+                    self.config.output_folder,
+                    f"{_stem(sample_name)}_generated.{default_ext}"
+                )
+                output_path = self._get_unique_file_path(base_output_path)
+            
+            job['image_generator'].generate_image(
+                ref_images_data,
+                job['sample_data'],
+                job['prompt'],
+                str(output_path),
+                ref_b64=ref_images_b64,
+                sample_b64=job['sample_b64']
+            )
+            if verbose:
+                if is_video:
+                    log.info("   ✓ %s", i18n.t('video_saved', path=output_path))
+                elif not pending:
+                    log.info("   ✓ %s", i18n.t('image_saved', path=output_path))
+        except Exception as e:
+            self._report_sample_error(job['sample_file'], e)
+            return None
+        
+        # Captions только для изображений, не для видео
+        if is_video:
+            return None
+        return {
+            'idx': job['idx'],
+            'path': str(output_path),
+            'pending': bool(pending),
+            'original_name': sample_name,
+            'caption_generator': job['caption_generator'],
+        }
+    
+    def _collect_generated(self, results: List[Dict]):
+        """Сохраняет информацию о сгенерированных изображениях в порядке sample файлов"""
+        i18n = get_i18n()
+        verbose = log.isEnabledFor(logging.INFO)
+        for record in results:
+            # Индекс начинается с 1 для _0001, _0002 и т.д.
+            index = len(self.generated_images) + 1
+            path = record['path']
+            if record['pending']:
+                final_path = os.path.join(
+                    os.path.dirname(path),
+                    f"{self.config.trigger_name}_{index:04d}{os.path.splitext(path)[1]}"
+                )
+                os.replace(path, final_path)
+                path = final_path
+                if verbose:
+                    log.info("   ✓ %s", i18n.t('image_saved', path=path))
+            self.generated_images.append(
+                GeneratedImage(path, record['original_name'], index, record['caption_generator'])
+            )
+    
+    def _remove_pending_files(self):
+        """Удаляет временные (.pending_*) файлы из папки LoRA датасета"""
+        try:
+            with os.scandir(self._lora_dir) as it:
+                stale = [entry.path for entry in it if entry.name.startswith(_PENDING_PREFIX)]
+        except FileNotFoundError:
+            return
+        for path in stale:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+    
+    @staticmethod
+    def _report_sample_error(sample_file: Dict, error: Exception):
+        """Выводит ошибку обработки sample изображения"""
+        i18n = get_i18n()
+        error_str = str(error)
+        # Проверяем, является ли это ошибкой API после всех попыток
+        if 'Wavespeed API вернул ошибку' in error_str or 'all_attempts_failed' in error_str:
+            log.warning("   ⏭️  %s", i18n.t('skipping_image_after_errors', name=sample_file['name'], error=error_str[:150]))
+        else:
+            log.error("   ❌ %s: %s: %s", i18n.t('error_processing_image'), sample_file['name'], error)
+    
     def _select_sample_image(self, sample_files: List[Dict]) -> Optional[Dict]:
         """Интерактивный выбор одного изображения из Sample Dataset"""
         if not sample_files:
@@ -369,26 +538,58 @@ class DatasetCreator:
         
         print(f"\n   [0] Отмена")
         
-        while True:
-            try:
-                choice = input("\n   Выберите номер изображения (1-{} или 0 для отмены): ".format(len(sample_files))).strip()
+        if READLINE_AVAILABLE:
+            import readline
+            
+            # Tab дополняет номер изображения
+            choices = [str(i) for i in range(len(sample_files) + 1)]
+            
+            def complete(text, state):
+                matches = [c for c in choices if c.startswith(text)]
+                return matches[state] if state < len(matches) else None
+            
+            previous_completer = readline.get_completer()
+            # Текущую привязку клавиши readline прочитать не позволяет. Без completer Tab в
+            # скрипте Python вставляет табуляцию - тогда привязываем его только на время выбора,
+            # а если completer уже настроен, Tab уже дополняет и привязку не трогаем
+            rebind_tab = previous_completer is None
+        
+        try:
+            if READLINE_AVAILABLE:
+                readline.set_completer(complete)
+                if rebind_tab:
+                    readline.parse_and_bind('tab: complete')
+            
+            while True:
+                try:
+                    choice = input("\n   Выберите номер изображения (1-{} или 0 для отмены): ".format(len(sample_files))).strip()
+                except KeyboardInterrupt:
+                    print("\n   ⚠️  Выбор отменен")
+                    return None
                 
                 if choice == '0':
                     return None
                 
+                # Проверка предикатом вместо перехвата ValueError от int()
+                if not choice.isdecimal():
+                    print(f"   ⚠️  Пожалуйста, введите число от 1 до {len(sample_files)} или 0 для отмены")
+                    continue
+                
                 choice_num = int(choice)
                 if 1 <= choice_num <= len(sample_files):
                     return sample_files[choice_num - 1]
-                else:
-                    print(f"   ⚠️  Пожалуйста, выберите число от 1 до {len(sample_files)} или 0 для отмены")
-            except ValueError:
-                print(f"   ⚠️  Пожалуйста, введите число от 1 до {len(sample_files)} или 0 для отмены")
-            except KeyboardInterrupt:
-                print("\n   ⚠️  Выбор отменен")
-                return None
+                print(f"   ⚠️  Пожалуйста, выберите число от 1 до {len(sample_files)} или 0 для отмены")
+        finally:
+            if READLINE_AVAILABLE:
+                readline.set_completer(previous_completer)
+                if rebind_tab:
+                    readline.parse_and_bind('tab: tab-insert')
     
     def _generate_captions(self):
         """Генерирует подписи для всех сгенерированных изображений и создает zip архив"""
+        import shutil
+        import zipfile
+        
         i18n = get_i18n()
         if not self.caption_generator:
             print(f"   ⚠️  {i18n.t('caption_generator_not_initialized')}")
@@ -396,29 +597,39 @@ class DatasetCreator:
         
         trigger_name = self.config.trigger_name
         # Используем ту же папку, где сохранены изображения (lora_dataset)
-        lora_dir = Path(self.config.output_folder) / "lora_dataset"
+        lora_dir = self._lora_dir
         lora_dir.mkdir(exist_ok=True)
         
         caption_files = []
         image_files = []
         
-        for img_info in self.generated_images:
-            img_path = Path(img_info['path'])
-            img_index = img_info['index']
+        def caption_task(img_info: GeneratedImage) -> str:
+            if log.isEnabledFor(logging.INFO):
+                log.info("   📝 %s", i18n.t('generating_caption_for', name=os.path.basename(img_info.path)))
+            # Подпись генерируется с настройками того типа контента, что и изображение
+            caption_generator = img_info.caption_generator or self.caption_generator
+            return caption_generator.generate_caption(img_info.path, trigger_name)
+        
+        # Запросы к API подписей выполняются параллельно (задержки сети перекрываются),
+        # файлы затем записываются последовательно в исходном порядке
+        workers = max(1, min(_CAPTION_WORKERS, len(self.generated_images)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            caption_futures = [executor.submit(caption_task, img_info) for img_info in self.generated_images]
+        
+        for img_info, caption_future in zip(self.generated_images, caption_futures):
+            img_path = Path(img_info.path)
+            img_index = img_info.index
             
             try:
-                print(f"   📝 {i18n.t('generating_caption_for', name=img_path.name)}")
-                
                 # Генерируем подпись
-                caption = self.caption_generator.generate_caption(str(img_path), trigger_name)
+                caption = caption_future.result()
                 
                 # Создаем имя файла: trigger_name_0001.txt, trigger_name_0002.txt и т.д.
                 caption_filename = f"{trigger_name}_{img_index:04d}.txt"
                 caption_path = lora_dir / caption_filename
                 
                 # Сохраняем подпись в ту же папку, где изображение
-                with open(caption_path, 'w', encoding='utf-8') as f:
-                    f.write(caption)
+                _write_text(caption_path, caption)
                 
                 caption_files.append({
                     'path': caption_path,
@@ -427,20 +638,24 @@ class DatasetCreator:
                 
                 # Изображение уже должно быть в lora_dir с правильным именем (сохранено при генерации)
                 # Проверяем, что имя соответствует формату trigger_name_XXXX.png
+                img_name = img_path.name
                 expected_img_name = f"{trigger_name}_{img_index:04d}{img_path.suffix}"
-                if img_path.parent != lora_dir or img_path.name != expected_img_name:
+                if img_path.parent != lora_dir or img_name != expected_img_name:
                     # Если изображение не в lora_dir или с неправильным именем, копируем/перемещаем его
                     new_img_path = lora_dir / expected_img_name
                     if img_path.exists():
-                        shutil.copy2(img_path, new_img_path)
-                        # Удаляем старое изображение если оно было в другой папке
-                        if img_path.parent != lora_dir:
+                        # В пределах одной файловой системы это просто переименование;
+                        # копирование нужно только при переносе между дисками
+                        try:
+                            os.replace(img_path, new_img_path)
+                        except OSError:
+                            shutil.copy2(img_path, new_img_path)
                             try:
-                                img_path.unlink()
-                            except:
+                                img_path.unlink(missing_ok=True)
+                            except OSError:
                                 pass
                     # Обновляем путь в информации об изображении
-                    img_info['path'] = str(new_img_path)
+                    img_info.path = str(new_img_path)
                     image_files.append({
                         'path': new_img_path,
                         'filename': expected_img_name
@@ -449,28 +664,31 @@ class DatasetCreator:
                     # Изображение уже в правильной папке с правильным именем
                     image_files.append({
                         'path': img_path,
-                        'filename': img_path.name
+                        'filename': img_name
                     })
                 
-                print(f"   ✓ Подпись сохранена: {caption_filename}")
+                log.info("   ✓ Подпись сохранена: %s", caption_filename)
                 
             except Exception as e:
-                print(f"   ❌ {i18n.t('error_generating_caption_for', name=img_path.name, error=e)}")
+                log.error("   ❌ %s", i18n.t('error_generating_caption_for', name=img_path.name, error=e))
                 continue
         
         # Создаем zip архив со всеми файлами (изображения + подписи)
         if caption_files:
-            zip_path = Path(self.config.output_folder) / f"{trigger_name}_lora_dataset.zip"
+            zip_path = self._output_dir / f"{trigger_name}_lora_dataset.zip"
             i18n = get_i18n()
             print(f"\n   📦 {i18n.t('creating_zip', name=zip_path.name)}")
             
-            with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+            # Изображения уже сжаты (PNG/JPG/WEBP) - кладем их без повторного сжатия,
+            # DEFLATE применяем только к текстовым подписям
+            with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_STORED, strict_timestamps=False) as zipf:
                 # Добавляем изображения
                 for img_file in image_files:
                     zipf.write(img_file['path'], img_file['filename'])
                 # Добавляем подписи
                 for caption_file in caption_files:
-                    zipf.write(caption_file['path'], caption_file['filename'])
+                    zipf.write(caption_file['path'], caption_file['filename'],
+                               compress_type=zipfile.ZIP_DEFLATED, compresslevel=6)
             
             print(f"   ✓ {i18n.t('zip_created_path', path=zip_path)}")
             print(f"   📁 {i18n.t('total_files', images=len(image_files), captions=len(caption_files))}")
@@ -1,15 +1,33 @@
 """Управление локальными файлами вместо Dropbox"""
 
+import os
+import re
 import mimetypes
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
+from typing import Iterator, List, Dict, Optional, Tuple
+
+# Поддерживаемые расширения изображений (в нижнем регистре)
+IMAGE_EXTENSIONS = frozenset({'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp'})
+
+# То же самое одной скомпилированной регуляркой: проверка имени без splitext/lower на каждый файл
+# (как и splitext, не считает расширением имя скрытого файла вроде '.png')
+_IMG_SUFFIX_RE = re.compile(
+    r'(?<=.)\.(?:' + '|'.join(sorted(re.escape(ext[1:]) for ext in IMAGE_EXTENSIONS)) + r')\Z',
+    re.IGNORECASE
+)
+
+# Размер пакета записей для параллельного stat (см. stat_workers)
+_STAT_BATCH = 256
 
 
 class LocalFileManager:
     """Управление локальными файлами вместо Dropbox"""
     
     @staticmethod
-    def list_image_files(folder_path: str, limit: int = 10, content_type: Optional[str] = None, include_nsfw: bool = True) -> List[Dict]:
+    def list_image_files(folder_path: str, limit: int = 10, content_type: Optional[str] = None, include_nsfw: bool = True,
+                         stat_workers: int = 0) -> List[Dict]:
         """Список изображений в папке с поддержкой подпапок NSFW и обычного контента
         
         Args:
@@ -17,14 +35,22 @@ class LocalFileManager:
             limit: Максимальное количество файлов
             content_type: Тип контента - 'nsfw', 'normal' или None (все)
             include_nsfw: Включать ли файлы из папки nsfw/ (по умолчанию True)
+            stat_workers: Число потоков для пакетного stat (0 - последовательно).
+                Полезно на сетевых/холодных дисках (NFS, SMB), где каждый stat ждет сеть;
+                на локальном SSD с прогретым кэшем последовательный вариант быстрее
         """
+        files = LocalFileManager.iter_image_files(folder_path, content_type, include_nsfw, stat_workers)
+        # Сканирование останавливается, как только набрано limit файлов
+        return list(islice(files, max(limit, 0)))
+    
+    @staticmethod
+    def iter_image_files(folder_path: str, content_type: Optional[str] = None, include_nsfw: bool = True,
+                         stat_workers: int = 0) -> Iterator[Dict]:
+        """Лениво перебирает изображения (те же правила, что у list_image_files)"""
         folder = Path(folder_path)
         if not folder.exists():
             raise FileNotFoundError(f"Папка не найдена: {folder_path}")
         
-        image_extensions = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp'}
-        files = []
-        
         # Если указан тип контента, ищем в соответствующей подпапке
         if content_type:
             subfolder = folder / content_type
@@ -33,74 +59,113 @@ class LocalFileManager:
             else:
                 # Если подпапки нет, ищем в корне
                 search_path = folder
-        else:
-            # Если тип не указан, ищем во всех подпапках и корне
-            search_paths = []
-            
-            # Проверяем подпапки normal и nsfw (сначала обычный контент, потом NSFW)
-            # Если include_nsfw=False, не добавляем папку nsfw
-            for subfolder_name in ['normal']:
-                subfolder = folder / subfolder_name
-                if subfolder.exists() and subfolder.is_dir():
-                    search_paths.append(subfolder)
-            
-            if include_nsfw:
-                nsfw_subfolder = folder / 'nsfw'
-                if nsfw_subfolder.exists() and nsfw_subfolder.is_dir():
-                    search_paths.append(nsfw_subfolder)
-            
-            # Также добавляем корневую папку для обратной совместимости
-            # (если файлы еще не перемещены в подпапки)
-            search_paths.append(folder)
+            return LocalFileManager._scan_images(search_path, content_type, stat_workers)
+        
+        # Если тип не указан, ищем во всех подпапках и корне
+        search_paths = []
+        
+        # Проверяем подпапки normal и nsfw (сначала обычный контент, потом NSFW)
+        # Если include_nsfw=False, не добавляем папку nsfw
+        normal_subfolder = folder / 'normal'
+        if normal_subfolder.exists() and normal_subfolder.is_dir():
+            search_paths.append(normal_subfolder)
+        
+        if include_nsfw:
+            nsfw_subfolder = folder / 'nsfw'
+            if nsfw_subfolder.exists() and nsfw_subfolder.is_dir():
+                search_paths.append(nsfw_subfolder)
+        
+        # Также добавляем корневую папку для обратной совместимости
+        # (если файлы еще не перемещены в подпапки)
+        search_paths.append(folder)
+        
+        return LocalFileManager._scan_search_paths(search_paths, include_nsfw, stat_workers)
+    
+    @staticmethod
+    def _scan_search_paths(search_paths: List[Path], include_nsfw: bool, stat_workers: int = 0) -> Iterator[Dict]:
+        """Перебирает изображения из нескольких папок, пропуская недоступные"""
+        for search_path in search_paths:
+            # Тип контента определяется по пути папки один раз, а не для каждого файла
+            content_type_detected = LocalFileManager.classify_content_type(str(search_path))
             
-            # Собираем файлы из всех путей
-            for search_path in search_paths:
-                try:
-                    for file_path in search_path.iterdir():
-                        if file_path.is_file() and file_path.suffix.lower() in image_extensions:
-                            # Определяем тип контента по пути
-                            content_type_detected = None
-                            if 'nsfw' in str(file_path.parent).lower():
-                                content_type_detected = 'nsfw'
-                            elif 'normal' in str(file_path.parent).lower():
-                                content_type_detected = 'normal'
-                            
-                            # Если NSFW отключен, пропускаем файлы из папки nsfw
-                            if not include_nsfw and content_type_detected == 'nsfw':
-                                continue
-                            
-                            files.append({
-                                'id': str(file_path),
-                                'name': file_path.name,
-                                'path': str(file_path),
-                                'size': file_path.stat().st_size,
-                                'content_type': content_type_detected
-                            })
-                            if len(files) >= limit:
-                                break
-                except (PermissionError, OSError):
-                    # Пропускаем папки, к которым нет доступа
-                    continue
-                
-                if len(files) >= limit:
-                    break
+            # Если NSFW отключен, пропускаем файлы из папки nsfw
+            if not include_nsfw and content_type_detected == 'nsfw':
+                continue
             
-            return files
+            try:
+                yield from LocalFileManager._scan_images(search_path, content_type_detected, stat_workers)
+            except (PermissionError, OSError):
+                # Пропускаем папки, к которым нет доступа
+                continue
+    
+    @staticmethod
+    def _scan_images(search_path: Path, content_type: Optional[str], stat_workers: int = 0) -> Iterator[Dict]:
+        """Перебирает изображения одной папки через os.scandir"""
+        if stat_workers > 1:
+            yield from LocalFileManager._scan_images_batched(search_path, content_type, stat_workers)
+            return
         
-        # Поиск в конкретной папке
-        for file_path in search_path.iterdir():
-            if file_path.is_file() and file_path.suffix.lower() in image_extensions:
-                files.append({
-                    'id': str(file_path),
-                    'name': file_path.name,
-                    'path': str(file_path),
-                    'size': file_path.stat().st_size,
+        with os.scandir(search_path) as it:
+            for entry in it:
+                # Тип записи берется из readdir, stat нужен только для размера
+                if not _IMG_SUFFIX_RE.search(entry.name) or not entry.is_file():
+                    continue
+                yield {
+                    'id': entry.path,
+                    'name': entry.name,
+                    'path': entry.path,
+                    'size': entry.stat().st_size,
+                    'content_type': content_type
+                }
+    
+    @staticmethod
+    def _scan_images_batched(search_path: Path, content_type: Optional[str], stat_workers: int) -> Iterator[Dict]:
+        """Как _scan_images, но размеры файлов запрашиваются пакетами параллельно"""
+        def describe(batch: List[os.DirEntry]) -> Iterator[Dict]:
+            sizes = executor.map(lambda entry: entry.stat().st_size, batch)
+            for entry, size in zip(batch, sizes):
+                yield {
+                    'id': entry.path,
+                    'name': entry.name,
+                    'path': entry.path,
+                    'size': size,
                     'content_type': content_type
-                })
-                if len(files) >= limit:
-                    break
+                }
         
-        return files
+        with os.scandir(search_path) as it, ThreadPoolExecutor(max_workers=stat_workers) as executor:
+            batch = []
+            for entry in it:
+                if not _IMG_SUFFIX_RE.search(entry.name) or not entry.is_file():
+                    continue
+                batch.append(entry)
+                if len(batch) >= _STAT_BATCH:
+                    yield from describe(batch)
+                    batch = []
+            if batch:
+                yield from describe(batch)
+    
+    @staticmethod
+    def classify_content_type(path_str: str) -> Optional[str]:
+        """Тип контента по пути: 'nsfw' или 'normal', если путь содержит такую папку, иначе None"""
+        # Сравниваем целые компоненты пути, чтобы 'my_normal_photos' не считалась папкой normal
+        path_lower = f"/{path_str.lower().replace(os.sep, '/')}/"
+        if '/nsfw/' in path_lower:
+            return 'nsfw'
+        if '/normal/' in path_lower:
+            return 'normal'
+        return None
+    
+    @staticmethod
+    def count_image_files(folder_path) -> int:
+        """Количество изображений непосредственно в папке (0, если папка недоступна)"""
+        try:
+            with os.scandir(folder_path) as it:
+                return sum(
+                    1 for entry in it
+                    if _IMG_SUFFIX_RE.search(entry.name) and entry.is_file()
+                )
+        except OSError:
+            return 0
     
     @staticmethod
     def read_file(file_path: str) -> Tuple[bytes, str]:
@@ -1,14 +1,28 @@
 """Генератор изображений через Wavespeed"""
 
-import base64
-import json
+import os
 import time
-from typing import List, Dict
+import random
+import hashlib
+import logging
+import threading
+import email.utils
+from collections import OrderedDict
+from urllib.parse import urlsplit
+from typing import List, Dict, Optional, Tuple
 
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+try:
+    # SIMD реализация base64 (опционально), API совместим со стандартным модулем
+    import pybase64 as base64
+    PYBASE64_AVAILABLE = True
+except ImportError:
+    import base64
+    PYBASE64_AVAILABLE = False
+
 try:
     from i18n import get_i18n
     I18N_AVAILABLE = True
@@ -20,15 +34,170 @@ except ImportError:
                 return key
         return SimpleI18n()
 
-from .config import Config
+from .config import Config, _dumps, _loads
+from .response_cache import ResponseCache
+
+# Сообщения о попадании в кэш и повторных попытках (в режиме --quiet не выводятся)
+log = logging.getLogger(__name__)
+
+# Базовый URL Wavespeed API (к нему добавляется путь модели)
+_API_ROOT = "https://api.wavespeed.ai/api/v3/"
+
+# Retry стратегия HTTP адаптера (неизменяемая, общая для всех сессий).
+# Минимальные retry на уровне HTTP, основная логика в коде (см. _make_wavespeed_request).
+# raise_on_status=False: после исчерпания retry возвращается последний ответ, а не RetryError,
+# чтобы опрос задачи и скачивание результата сами решали, повторять ли 5xx/429
+_HTTP_RETRY = Retry(
+    total=1,
+    backoff_factor=2,
+    status_forcelist=(429, 500, 502, 503, 504),
+    raise_on_status=False
+)
+
+# Сколько закодированных в base64 референсов хранит генератор
+_B64_CACHE_SIZE = 16
+
+# Очистка промпта от переносов строк и табуляций за один проход
+_PROMPT_TRANS = str.maketrans({'\n': ' ', '\r': ' ', '\t': ' '})
+
+# Размер блока при скачивании результата (изображения 4K и видео не держим в памяти целиком)
+_DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Опрос асинхронной задачи Wavespeed: общий лимит ожидания, начальная и максимальная задержка (секунды)
+_POLL_TIMEOUT = 3600
+_POLL_INITIAL_DELAY = 1.0
+_POLL_MAX_DELAY = 10.0
+_PENDING_STATUSES = frozenset(('created', 'pending', 'processing'))
+
+# Ключи ответа API с URL результата по типу
+_MEDIA_URL_KEYS = {
+    'image': ('image', 'image_url'),
+    'video': ('video', 'video_url'),
+}
+
+# Максимум попыток запроса при ошибках, которые можно повторить (5xx, 429, ошибка в ответе API)
+_MAX_ATTEMPTS = 3
+
+# Верхняя граница задержки между попытками и ожидания по заголовку Retry-After (секунды)
+_MAX_BACKOFF = 60
+_MAX_RETRY_AFTER = 300
+
+
+def _retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Значение заголовка Retry-After в секундах (число секунд или HTTP-дата)"""
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = email.utils.parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(seconds, 0.0), _MAX_RETRY_AFTER)
+
+
+def _backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """Задержка перед попыткой attempt (начиная со 2-й): экспоненциальная со случайным разбросом
+    
+    Разброс (full jitter) не дает параллельным задачам повторять запросы синхронно,
+    а Retry-After от сервера задает минимальную задержку.
+    """
+    wait_time = random.uniform(0, min(2 ** (attempt - 2) * 2, _MAX_BACKOFF))
+    if retry_after is not None:
+        wait_time = max(wait_time, retry_after)
+    return round(wait_time, 1)
+
+
+def _raise_for_status(response: requests.Response):
+    """Аналог response.raise_for_status(): на успешном ответе проверяется только код"""
+    if response.status_code >= 400:
+        raise requests.exceptions.HTTPError(f"{response.status_code} {response.reason} for url: {response.url}",
+                                            response=response)
+
+
+class _RetryableError(Exception):
+    """Ошибка запроса к Wavespeed, после которой можно повторить попытку"""
+    
+    def __init__(self, message: str, detail: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        # Краткое описание для сообщения о повторной попытке
+        self.detail = detail
+        # Задержка, запрошенная сервером (заголовок Retry-After)
+        self.retry_after = retry_after
 
 
 class ImageGenerator:
     """Генератор изображений через Wavespeed"""
     
+    # wavespeed_resolution (1k, 2k, 4k) -> параметр size для Seedream моделей
+    _SEEDREAM_SIZES = {
+        '1k': '1920*1920',  # Минимум для Seedream (3686400 пикселей)
+        '2k': '2048*2048',  # 4194304 пикселей
+        '4k': '4096*4096'   # 16777216 пикселей
+    }
+    
     def __init__(self, config: Config):
         self.config = config
+        # Экземпляр локализации общий (смена языка меняет его на месте), берем его один раз
+        self._i18n = get_i18n()
         self.setup_provider()
+        # Одна сессия на генератор: соединения (TCP + TLS) к API и CDN переиспользуются между запросами
+        self._session = self._create_session()
+        # Заголовки API одинаковы для всех запросов генератора. Передаются в каждом запросе,
+        # а не в сессии: ключ API не должен уходить на CDN при скачивании результата
+        self._headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {config.wavespeed_api_key}"
+        }
+        # Модель и параметры вывода не меняются за время жизни генератора - разбираем их один раз
+        model = config.wavespeed_model
+        self._url = _API_ROOT + model
+        self._is_video = 'image-to-video' in model or '/video' in model
+        self._edit_options = self._edit_options_for(config)
+        # base64 референсов по хэшу содержимого (LRU, см. _encode_ref)
+        self._b64_cache: 'OrderedDict[bytes, str]' = OrderedDict()
+        self._b64_lock = threading.Lock()
+        # Кэш результатов (повторный запуск с теми же входными данными не вызывает платный API)
+        self._cache = None
+        cache_dir = getattr(config, 'response_cache_dir', '')
+        if cache_dir:
+            self._cache = ResponseCache(
+                cache_dir,
+                ttl=float(getattr(config, 'response_cache_ttl_hours', 168)) * 3600,
+                max_size=int(getattr(config, 'response_cache_max_mb', 1024)) * 1024 * 1024
+            )
+    
+    @classmethod
+    def _edit_options_for(cls, config: Config) -> Dict:
+        """Параметры размера и формата вывода для edit моделей"""
+        options = {}
+        resolution = getattr(config, 'wavespeed_resolution', '1k')
+        # Для Seedream моделей используем параметр size в формате "1920*1920"
+        # Минимум для Seedream: 3686400 пикселей (1920x1920)
+        if 'seedream' in config.wavespeed_model.lower():
+            # Преобразуем wavespeed_resolution (1k, 2k, 4k) в формат size
+            # Используем безопасные значения, соответствующие минимуму API
+            options["size"] = cls._SEEDREAM_SIZES.get(resolution, '1920*1920')
+        elif resolution:
+            # Для других моделей (Nano Banana Pro) используем resolution
+            options["resolution"] = resolution
+        
+        # Добавляем формат вывода если нужно
+        output_format = getattr(config, 'wavespeed_output_format', '')
+        if output_format:
+            options["output_format"] = output_format
+        return options
+    
+    @staticmethod
+    def _create_session() -> requests.Session:
+        """Создает HTTP сессию с пулом соединений и retry стратегией"""
+        session = requests.Session()
+        # pool_maxsize покрывает параллельные потоки генерации изображений
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=_HTTP_RETRY)
+        # API и CDN результатов работают только по https
+        session.mount("https://", adapter)
+        return session
     
     def setup_provider(self):
         """Настраивает выбранный провайдер генерации изображений"""
@@ -38,335 +207,379 @@ class ImageGenerator:
         else:
             raise ValueError(f"Неизвестный провайдер генерации: {self.config.image_provider}")
     
-    def generate_image(self, ref_images: List[bytes], sample_image: bytes, prompt: str, output_path: str):
-        """Генерирует изображение/видео и сохраняет его"""
+    def generate_image(self, ref_images: List[bytes], sample_image: bytes, prompt: str, output_path: str,
+                       ref_b64: Optional[List[str]] = None, sample_b64: Optional[str] = None):
+        """Генерирует изображение/видео и сохраняет его
+        
+        Args:
+            ref_b64: Заранее закодированные в base64 референсы (чтобы не кодировать их для каждого sample)
+            sample_b64: Заранее закодированный в base64 sample (если уже закодирован для генерации промпта)
+        """
         if self.config.image_provider == 'wavespeed':
-            self._generate_with_wavespeed(ref_images, sample_image, prompt, output_path)
+            self._generate_with_wavespeed(ref_images, sample_image, prompt, output_path, ref_b64, sample_b64)
         else:
             raise ValueError(f"Неподдерживаемый провайдер: {self.config.image_provider}")
     
-    def _generate_with_wavespeed(self, ref_images: List[bytes], sample_image: bytes, prompt: str, output_path: str):
+    def _generate_with_wavespeed(self, ref_images: List[bytes], sample_image: bytes, prompt: str, output_path: str,
+                                 ref_b64: Optional[List[str]] = None, sample_b64: Optional[str] = None):
         """Генерация через Wavespeed API с поддержкой разных моделей"""
-        model = self.config.wavespeed_model
+        url, payload, headers, is_video = self._build_wavespeed_request(ref_images, sample_image, prompt, ref_b64, sample_b64)
+        cache_key = self._cache_key(url, payload, ref_images, sample_image, is_video)
+        if cache_key and self._load_cached(cache_key, output_path, is_video):
+            return {'cached': True}
+        result, saved_path = self._make_wavespeed_request(url, payload, headers, output_path, is_video=is_video)
+        if cache_key:
+            self._store_cached(cache_key, saved_path)
+        return result
+    
+    def _cache_key(self, url: str, payload: Dict, ref_images: List[bytes], sample_image: bytes,
+                   is_video: bool) -> Optional[str]:
+        """Ключ кэша для запроса (None, если кэш отключен)"""
+        if self._cache is None:
+            return None
+        # Изображения учитываются по хэшу исходных байтов, а не по base64 строкам из payload
+        params = {k: v for k, v in payload.items() if k not in ('images', 'image')}
+        images = [sample_image] if is_video else list(ref_images[:2]) + [sample_image]
+        return ResponseCache.make_key(url, params, images)
+    
+    def _load_cached(self, cache_key: str, output_path: str, is_video: bool) -> bool:
+        """Копирует результат из кэша в output_path; True при попадании"""
+        meta = self._cache.get(cache_key)
+        if meta is None:
+            return False
+        if is_video:
+            output_path = self._video_output_path(output_path, meta.get('ext', 'mp4'))
+        if not self._cache.copy_to(cache_key, output_path):
+            return False
+        log.info("   ♻️  %s", self._i18n.t('image_from_cache', path=output_path))
+        return True
+    
+    def _store_cached(self, cache_key: str, saved_path: str):
+        """Сохраняет результат в кэш"""
+        ext = os.path.splitext(saved_path)[1].lstrip('.') or 'png'
+        self._cache.set(cache_key, saved_path, ext)
+    
+    @staticmethod
+    def _video_output_path(output_path: str, ext: str) -> str:
+        """Путь видео с расширением результата вместо расширения изображения"""
+        root, old_ext = os.path.splitext(output_path)
+        if old_ext in ('.png', '.jpg'):
+            return f"{root}.{ext}"
+        return output_path
+    
+    def _build_wavespeed_request(self, ref_images: List[bytes], sample_image: bytes, prompt: str,
+                                 ref_b64: Optional[List[str]] = None,
+                                 sample_b64: Optional[str] = None) -> Tuple[str, Dict, Dict, bool]:
+        """Формирует запрос к Wavespeed API: (url, payload, headers, is_video)"""
+        if sample_b64 is None:
+            sample_b64 = base64.b64encode(sample_image).decode('ascii')
         
-        # Определяем тип модели и endpoint
-        if 'image-to-video' in model or '/video' in model:
-            self._generate_video_wavespeed(ref_images, sample_image, prompt, output_path, model)
+        # Тип модели определен в __init__
+        if self._is_video:
+            payload = self._build_video_request(sample_b64, prompt)
         else:
             # Все модели поддерживают image-to-image (edit, seedream)
-            self._generate_image_edit_wavespeed(ref_images, sample_image, prompt, output_path, model)
-    
-    def _generate_image_edit_wavespeed(self, ref_images: List[bytes], sample_image: bytes, prompt: str, output_path: str, model: str):
-        """Генерация через Wavespeed Image-to-Image API (edit модели)"""
-        # Формируем URL для модели (заменяем / на правильный формат)
-        model_path = model
-        url = f"https://api.wavespeed.ai/api/v3/{model_path}"
+            payload = self._build_image_edit_request(ref_images, sample_b64, prompt, ref_b64)
         
+        return self._url, payload, self._headers, self._is_video
+    
+    def _build_image_edit_request(self, ref_images: List[bytes], sample_b64: str, prompt: str,
+                                  ref_b64: Optional[List[str]] = None) -> Dict:
+        """Тело запроса к Wavespeed Image-to-Image API (edit модели)"""
         # Подготовка изображений в base64
-        images_base64 = []
-        for img_data in ref_images[:2]:
-            images_base64.append(base64.b64encode(img_data).decode('utf-8'))
-        images_base64.append(base64.b64encode(sample_image).decode('utf-8'))
+        if ref_b64 is not None:
+            images_base64 = list(ref_b64[:2])
+        else:
+            images_base64 = [self._encode_ref(img_data) for img_data in ref_images[:2]]
+        images_base64.append(sample_b64)
         
         # Очистка промпта от переносов строк
-        clean_prompt = prompt.replace('\n', ' ').replace('\r', ' ')
+        clean_prompt = prompt.translate(_PROMPT_TRANS)
         
         payload = {
             "enable_base64_output": False,
-            "enable_sync_mode": True,  # Синхронный режим для получения результата сразу
+            "enable_sync_mode": False,  # Результат получаем опросом задачи (см. _poll_prediction)
             "images": images_base64,
-            "prompt": clean_prompt
+            "prompt": clean_prompt,
+            # size/resolution/output_format, вычислены в __init__
+            **self._edit_options
         }
         
-        # Определяем, является ли модель Seedream
-        is_seedream = 'seedream' in model.lower()
+        return payload
+    
+    def _encode_ref(self, img_data: bytes) -> str:
+        """base64 референса с кэшем: одни и те же референсы используются для многих sample"""
+        key = hashlib.blake2b(img_data, digest_size=16).digest()
+        with self._b64_lock:
+            encoded = self._b64_cache.get(key)
+            if encoded is not None:
+                self._b64_cache.move_to_end(key)
+                return encoded
+        encoded = base64.b64encode(img_data).decode('ascii')
+        with self._b64_lock:
+            self._b64_cache[key] = encoded
+            if len(self._b64_cache) > _B64_CACHE_SIZE:
+                self._b64_cache.popitem(last=False)
+        return encoded
+    
+    def _build_video_request(self, sample_b64: str, prompt: str) -> Dict:
+        """Тело запроса к Wavespeed Image-to-Video API"""
+        # Очистка промпта
+        clean_prompt = prompt.translate(_PROMPT_TRANS)
         
-        # Для Seedream моделей используем параметр size в формате "1920*1920"
-        # Минимум для Seedream: 3686400 пикселей (1920x1920)
-        if is_seedream:
-            # Преобразуем wavespeed_resolution (1k, 2k, 4k) в формат size
-            # Используем безопасные значения, соответствующие минимуму API
-            resolution_map = {
-                '1k': '1920*1920',  # Минимум для Seedream (3686400 пикселей)
-                '2k': '2048*2048',  # 4194304 пикселей
-                '4k': '4096*4096'   # 16777216 пикселей
-            }
-            resolution = getattr(self.config, 'wavespeed_resolution', '1k')
-            size_value = resolution_map.get(resolution, '1920*1920')
-            payload["size"] = size_value
-        else:
-            # Для других моделей (Nano Banana Pro) используем resolution
-            if hasattr(self.config, 'wavespeed_resolution') and self.config.wavespeed_resolution:
-                payload["resolution"] = self.config.wavespeed_resolution
+        payload = {
+            "enable_base64_output": False,
+            "enable_sync_mode": False,  # Результат получаем опросом задачи (см. _poll_prediction)
+            "image": sample_b64,  # Для video sample_image - основное изображение
+            "prompt": clean_prompt
+        }
         
-        # Добавляем формат вывода если нужно
-        if hasattr(self.config, 'wavespeed_output_format') and self.config.wavespeed_output_format:
-            payload["output_format"] = self.config.wavespeed_output_format
+        return payload
+    
+    def _unwrap_result(self, result: Dict) -> Tuple[Dict, Optional[str]]:
+        """Разворачивает ответ Wavespeed {code, message, data}
         
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.config.wavespeed_api_key}"
-        }
+        Returns:
+            (результат, текст ошибки API или None)
+        """
+        # Обработка формата ответа Wavespeed с оберткой {code, message, data}
+        if 'data' in result:
+            data = result['data']
+            # Проверяем наличие error или status == 'failed'
+            if data.get('status') == 'failed' or data.get('error'):
+                return data, data.get('error', self._i18n.t('unknown_error'))
+            # Извлекаем данные из data
+            result = data
         
-        response = self._make_wavespeed_request(url, payload, headers, output_path, is_video=False)
-        return response
+        # Проверяем наличие error или status == 'failed' в основном ответе
+        if result.get('status') == 'failed' or result.get('error'):
+            return result, result.get('error', self._i18n.t('unknown_error'))
+        return result, None
+    
+    @staticmethod
+    def _extract_media_url(result: Dict, kind: str) -> Optional[str]:
+        """URL результата ('image' или 'video') из ответа API"""
+        for key in _MEDIA_URL_KEYS[kind]:
+            media_url = result.get(key)
+            if media_url:
+                return media_url
+        # Wavespeed возвращает массив URL в outputs
+        outputs = result.get('outputs')
+        if outputs and isinstance(outputs, list):
+            return outputs[0]
+        return None
     
-    def _generate_video_wavespeed(self, ref_images: List[bytes], sample_image: bytes, prompt: str, output_path: str, model: str):
-        """Генерация видео через Wavespeed Image-to-Video API"""
-        model_path = model
-        url = f"https://api.wavespeed.ai/api/v3/{model_path}"
+    @staticmethod
+    def _resolve_media(result: Dict, output_path: str, is_video: bool) -> Tuple[Optional[str], Optional[bytes], str]:
+        """Находит результат генерации в ответе API
         
-        # Для video используем sample_image как основное изображение
-        image_base64 = base64.b64encode(sample_image).decode('utf-8')
+        Returns:
+            (URL для скачивания или None, данные из base64 или None, итоговый путь файла)
+        """
+        kind = 'video' if is_video else 'image'
+        media_url = ImageGenerator._extract_media_url(result, kind)
         
-        # Очистка промпта
-        clean_prompt = prompt.replace('\n', ' ').replace('\r', ' ')
+        if media_url:
+            if is_video:
+                # Расширение берем из пути URL (без query), иначе mp4
+                ext = os.path.splitext(urlsplit(media_url).path)[1].lstrip('.') or 'mp4'
+                output_path = ImageGenerator._video_output_path(output_path, ext)
+            return media_url, None, output_path
         
-        payload = {
-            "enable_base64_output": False,
-            "enable_sync_mode": False,  # Видео обычно асинхронное
-            "image": image_base64,
-            "prompt": clean_prompt
-        }
+        media_base64 = result.get(f'{kind}_base64')
+        if media_base64 is not None:
+            if is_video:
+                output_path = ImageGenerator._video_output_path(output_path, 'mp4')
+            return None, base64.b64decode(media_base64), output_path
         
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.config.wavespeed_api_key}"
-        }
+        # Сохраняем ответ для отладки
+        debug_path = f"{os.path.splitext(output_path)[0]}_response.json"
+        with open(debug_path, 'wb') as f:
+            f.write(_dumps(result))
+        kind_name = 'видео' if is_video else 'изображения'
+        raise ValueError(f"Неожиданный формат ответа для {kind_name}: {result.keys()}")
+    
+    @staticmethod
+    def _is_pending(result: Dict) -> bool:
+        """Задача принята API, но результат еще не готов"""
+        return bool(result.get('id')) and result.get('status') in _PENDING_STATUSES
+    
+    @staticmethod
+    def _poll_url(result: Dict) -> str:
+        """URL для получения результата задачи"""
+        return (result.get('urls') or {}).get('get') or \
+            f"{_API_ROOT}predictions/{result['id']}/result"
+    
+    def _poll_prediction(self, session: requests.Session, result: Dict, headers: Dict) -> Dict:
+        """Опрашивает задачу короткими запросами, пока она не завершится
+        
+        В отличие от синхронного режима соединение не занято все время генерации,
+        а сетевой сбой во время ожидания не теряет уже запущенную задачу.
         
-        response = self._make_wavespeed_request(url, payload, headers, output_path, is_video=True)
-        return response
+        Returns:
+            Ответ API с завершенной (или неудачной) задачей
+        """
+        poll_url = self._poll_url(result)
+        deadline = time.monotonic() + _POLL_TIMEOUT
+        delay = _POLL_INITIAL_DELAY
+        while True:
+            time.sleep(delay)
+            delay = min(delay * 2, _POLL_MAX_DELAY)
+            try:
+                response = session.get(poll_url, headers=headers, timeout=30)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                response = None
+            if response is not None and response.status_code < 500 and response.status_code != 429:
+                _raise_for_status(response)
+                payload = _loads(response.content)
+                if payload.get('data', payload).get('status') not in _PENDING_STATUSES:
+                    return payload
+            # Задача еще выполняется или сбой опроса - повторяем до общего лимита
+            if time.monotonic() >= deadline:
+                raise requests.exceptions.Timeout(poll_url)
+    
+    def _announce_retry(self, attempt: int, max_attempts: int, retry_after: Optional[float]) -> float:
+        """Выводит сообщение о повторной попытке и возвращает задержку перед ней"""
+        i18n = self._i18n
+        wait_time = _backoff_delay(attempt, retry_after)
+        log.info("   ⏳ %s", i18n.t('retry_attempt', attempt=attempt, max=max_attempts))
+        log.info("   ⏳ %s", i18n.t('waiting_before_retry', seconds=wait_time))
+        return wait_time
+    
+    def _http_error(self, status: int, text: str, retry_after: Optional[str]) -> Exception:
+        """Ошибка для HTTP статуса >= 400: 5xx и 429 можно повторить, остальные 4xx - нет"""
+        retryable = status >= 500 or status == 429
+        error_msg = f"HTTP {status} {'Server' if status >= 500 else 'Client'} Error"
+        if text:
+            error_msg += f": {text[:200]}"
+        message = self._i18n.t('wavespeed_request_error', error=error_msg)
+        if retryable:
+            return _RetryableError(message, error_msg, _retry_after_seconds(retry_after))
+        return RuntimeError(message)
+    
+    def _parse_result(self, body: bytes) -> Tuple[Dict, Optional[str]]:
+        """Разбирает тело ответа API; некорректный JSON - ошибка, которую можно повторить"""
+        try:
+            return self._unwrap_result(_loads(body))
+        except ValueError as e:
+            error_msg = f"Invalid JSON: {e}"
+            raise _RetryableError(self._i18n.t('wavespeed_request_error', error=error_msg), error_msg)
+    
+    def _check_api_error(self, api_error: Optional[str]):
+        """Ошибка в ответе API (status == 'failed' или error) - повторяем попытку"""
+        if api_error is not None:
+            api_error = str(api_error)
+            raise _RetryableError(self._i18n.t('wavespeed_api_error', error=api_error), api_error)
+    
+    def _request_error_message(self, error: Exception) -> str:
+        """Текст ошибки HTTP запроса с кодом и ответом сервера, если они есть"""
+        i18n = self._i18n
+        error_msg = i18n.t('wavespeed_request_error', error=str(error))
+        response = getattr(error, 'response', None)
+        if response is not None:
+            error_msg += f" (HTTP {response.status_code})"
+            if response.text:
+                error_msg += f"\n{i18n.t('server_response')}: {response.text[:500]}"
+        return error_msg
+    
+    def _report_retry(self, error: '_RetryableError', attempt: int, max_attempts: int):
+        """Выводит ошибку, после которой будет повторная попытка"""
+        log.warning("   ⚠️  %s", error)
+        log.warning("   ⚠️  %s", self._i18n.t('api_error_retry', attempt=attempt, max=max_attempts, error=error.detail[:100]))
     
-    def _make_wavespeed_request(self, url: str, payload: Dict, headers: Dict, output_path: str, is_video: bool = False):
-        """Выполняет запрос к Wavespeed API с обработкой ошибок и повторными попытками"""
-        i18n = get_i18n()
+    def _make_wavespeed_request(self, url: str, payload: Dict, headers: Dict, output_path: str,
+                                is_video: bool = False) -> Tuple[Dict, str]:
+        """Выполняет запрос к Wavespeed API с повторными попытками
         
-        # Настройка retry стратегии для HTTP запросов
-        session = requests.Session()
-        retry_strategy = Retry(
-            total=1,  # Минимальные retry на уровне HTTP, основная логика в коде
-            backoff_factor=2,
-            status_forcelist=[429, 500, 502, 503, 504]
-        )
-        adapter = HTTPAdapter(max_retries=retry_strategy)
-        session.mount("http://", adapter)
-        session.mount("https://", adapter)
+        Повторяются только ошибки _RetryableError (5xx, 429, ошибка в ответе API,
+        некорректный или неполный ответ), остальные сразу прерывают генерацию.
+        Сбой при скачивании готового результата повторяет только скачивание (см. _download_media).
         
-        # Максимум 3 попытки при ошибках от сервера (error в ответе)
-        max_error_attempts = 3
-        attempt = 0
-        last_error = None
+        Returns:
+            (ответ API, путь сохраненного файла)
+        """
+        # Тело запроса сериализуется один раз на все попытки (orjson, если установлен):
+        # base64 изображений - самая большая часть payload
+        body = _dumps(payload, indent=False)
+        retry_after = None
         
-        while attempt < max_error_attempts:
-            attempt += 1
+        for attempt in range(1, _MAX_ATTEMPTS + 1):
+            if attempt > 1:
+                time.sleep(self._announce_retry(attempt, _MAX_ATTEMPTS, retry_after))
             try:
-                # Если это не первая попытка, выводим сообщение о повторной попытке
-                if attempt > 1:
-                    i18n = get_i18n()
-                    wait_time = min((attempt - 1) * 3, 30)  # Задержка до 30 секунд
-                    print(f"   ⏳ {i18n.t('retry_attempt', attempt=attempt, max=max_error_attempts)}")
-                    print(f"   ⏳ {i18n.t('waiting_before_retry', seconds=wait_time)}")
-                    time.sleep(wait_time)
-                
-                # Используем большой таймаут для совместимости
-                response = session.post(url, json=payload, headers=headers, timeout=3600)
-                
-                # Проверяем HTTP статус код перед парсингом JSON
-                if response.status_code >= 500:
-                    # Ошибка сервера (5xx) - повторяем попытку
-                    i18n = get_i18n()
-                    error_msg = f"HTTP {response.status_code} Server Error"
-                    if hasattr(response, 'text') and response.text:
-                        error_msg += f": {response.text[:200]}"
-                    
-                    if attempt < max_error_attempts:
-                        print(f"   ⚠️  {i18n.t('wavespeed_request_error', error=error_msg)}")
-                        print(f"   ⚠️  {i18n.t('api_error_retry', attempt=attempt, max=max_error_attempts, error=error_msg[:100])}")
-                        last_error = error_msg
-                        continue
-                    else:
-                        # Исчерпаны все попытки
-                        raise RuntimeError(i18n.t('wavespeed_request_error', error=error_msg))
-                elif response.status_code >= 400:
-                    # Ошибка клиента (4xx) - не повторяем
-                    i18n = get_i18n()
-                    error_msg = f"HTTP {response.status_code} Client Error"
-                    if hasattr(response, 'text') and response.text:
-                        error_msg += f": {response.text[:200]}"
-                    raise RuntimeError(i18n.t('wavespeed_request_error', error=error_msg))
-                
-                # Если статус код успешный (2xx), парсим JSON
-                result = response.json()
-                
-                # Обработка формата ответа Wavespeed с оберткой {code, message, data}
-                if 'data' in result:
-                    data = result['data']
-                    # Проверяем наличие error или status == 'failed'
-                    if data.get('status') == 'failed' or data.get('error'):
-                        i18n = get_i18n()
-                        error_msg = data.get('error', i18n.t('unknown_error'))
-                        # Это ошибка в ответе API - повторяем попытку
-                        if attempt < max_error_attempts:
-                            print(f"   ⚠️  {i18n.t('wavespeed_api_error', error=error_msg)}")
-                            print(f"   ⚠️  {i18n.t('api_error_retry', attempt=attempt, max=max_error_attempts, error=error_msg[:100])}")
-                            last_error = error_msg
-                            continue
-                        else:
-                            # Исчерпаны все попытки
-                            raise RuntimeError(i18n.t('wavespeed_api_error', error=error_msg))
-                    # Извлекаем данные из data
-                    result = data
-                
-                # Проверяем наличие error или status == 'failed' в основном ответе
-                if result.get('status') == 'failed' or result.get('error'):
-                    i18n = get_i18n()
-                    error_msg = result.get('error', i18n.t('unknown_error'))
-                    # Это ошибка в ответе API - повторяем попытку
-                    if attempt < max_error_attempts:
-                        print(f"   ⚠️  {i18n.t('wavespeed_api_error', error=error_msg)}")
-                        print(f"   ⚠️  {i18n.t('api_error_retry', attempt=attempt, max=max_error_attempts, error=error_msg[:100])}")
-                        last_error = error_msg
-                        continue
-                    else:
-                        # Исчерпаны все попытки
-                        raise RuntimeError(i18n.t('wavespeed_api_error', error=error_msg))
-                
-                # Сохранение результата
-                if is_video:
-                    # Для видео
-                    video_url = None
-                    if 'video' in result:
-                        video_url = result.get('video')
-                    elif 'video_url' in result:
-                        video_url = result.get('video_url')
-                    elif 'outputs' in result and isinstance(result['outputs'], list) and len(result['outputs']) > 0:
-                        # Wavespeed возвращает массив URL в outputs
-                        video_url = result['outputs'][0]
-                    
-                    if video_url:
-                        video_response = requests.get(video_url, timeout=300)
-                        video_response.raise_for_status()
-                        # Определяем расширение из URL или используем mp4
-                        ext = 'mp4'
-                        if '.' in video_url:
-                            ext = video_url.split('.')[-1].split('?')[0]
-                        output_path = output_path.replace('.png', f'.{ext}').replace('.jpg', f'.{ext}')
-                        with open(output_path, 'wb') as f:
-                            f.write(video_response.content)
-                    elif 'video_base64' in result:
-                        video_data = base64.b64decode(result['video_base64'])
-                        output_path = output_path.replace('.png', '.mp4').replace('.jpg', '.mp4')
-                        with open(output_path, 'wb') as f:
-                            f.write(video_data)
-                    else:
-                        # Сохраняем ответ для отладки
-                        with open(output_path.replace('.png', '_response.json').replace('.mp4', '_response.json'), 'w') as f:
-                            json.dump(result, f, indent=2)
-                        raise ValueError(f"Неожиданный формат ответа для видео: {result.keys()}")
-                else:
-                    # Для изображений
-                    image_url = None
-                    if 'image' in result:
-                        image_url = result.get('image')
-                    elif 'image_url' in result:
-                        image_url = result.get('image_url')
-                    elif 'outputs' in result and isinstance(result['outputs'], list) and len(result['outputs']) > 0:
-                        # Wavespeed возвращает массив URL в outputs
-                        image_url = result['outputs'][0]
-                    
-                    if image_url:
-                        img_response = requests.get(image_url, timeout=300)
-                        img_response.raise_for_status()
-                        with open(output_path, 'wb') as f:
-                            f.write(img_response.content)
-                    elif 'image_base64' in result:
-                        img_data = base64.b64decode(result['image_base64'])
-                        with open(output_path, 'wb') as f:
-                            f.write(img_data)
-                    else:
-                        # Сохраняем ответ для отладки
-                        with open(output_path.replace('.png', '_response.json').replace('.jpg', '_response.json'), 'w') as f:
-                            json.dump(result, f, indent=2)
-                        raise ValueError(f"Неожиданный формат ответа для изображения: {result.keys()}")
-                
-                # Если дошли сюда, значит все успешно
-                return result
-                
-            except requests.exceptions.Timeout as e:
-                i18n = get_i18n()
-                last_error = e
-                error_msg = i18n.t('wavespeed_timeout_error', timeout=3600)
-                # Таймаут - не повторяем, выбрасываем ошибку
-                raise RuntimeError(error_msg)
-                
-            except requests.exceptions.HTTPError as e:
-                # HTTP ошибки (4xx, 5xx)
-                i18n = get_i18n()
-                last_error = e
-                status_code = e.response.status_code if hasattr(e, 'response') and e.response else None
-                
-                if status_code and 500 <= status_code < 600:
-                    # Ошибка сервера (5xx) - повторяем попытку
-                    error_msg = i18n.t('wavespeed_request_error', error=str(e))
-                    if hasattr(e, 'response') and e.response is not None:
-                        if hasattr(e.response, 'status_code'):
-                            error_msg += f" (HTTP {e.response.status_code})"
-                        if hasattr(e.response, 'text'):
-                            server_response = e.response.text[:500]
-                            error_msg += f"\n{i18n.t('server_response')}: {server_response}"
-                    
-                    if attempt < max_error_attempts:
-                        print(f"   ⚠️  {error_msg}")
-                        print(f"   ⚠️  {i18n.t('api_error_retry', attempt=attempt, max=max_error_attempts, error=error_msg[:100])}")
-                        last_error = error_msg
-                        continue
-                    else:
-                        # Исчерпаны все попытки
-                        raise RuntimeError(error_msg)
-                else:
-                    # Ошибка клиента (4xx) - не повторяем
-                    error_msg = i18n.t('wavespeed_request_error', error=str(e))
-                    if hasattr(e, 'response') and e.response is not None:
-                        if hasattr(e.response, 'status_code'):
-                            error_msg += f" (HTTP {e.response.status_code})"
-                        if hasattr(e.response, 'text'):
-                            server_response = e.response.text[:500]
-                            error_msg += f"\n{i18n.t('server_response')}: {server_response}"
-                    raise RuntimeError(error_msg)
-                
+                result, media_url, media_data, saved_path = self._request_once(url, body, headers, output_path, is_video)
+                break
+            except _RetryableError as e:
+                if attempt == _MAX_ATTEMPTS:
+                    raise RuntimeError(str(e))
+                self._report_retry(e, attempt, _MAX_ATTEMPTS)
+                retry_after = e.retry_after
+            except requests.exceptions.Timeout:
+                raise RuntimeError(self._i18n.t('wavespeed_timeout_error', timeout=_POLL_TIMEOUT))
             except requests.exceptions.RequestException as e:
-                # Другие ошибки запроса (сеть, соединение и т.д.)
-                i18n = get_i18n()
-                last_error = e
-                error_msg = i18n.t('wavespeed_request_error', error=str(e))
-                if hasattr(e, 'response') and e.response is not None:
-                    if hasattr(e.response, 'status_code'):
-                        error_msg += f" (HTTP {e.response.status_code})"
-                    if hasattr(e.response, 'text'):
-                        server_response = e.response.text[:500]
-                        error_msg += f"\n{i18n.t('server_response')}: {server_response}"
-                
-                # Сетевые ошибки - не повторяем, выбрасываем ошибку
-                raise RuntimeError(error_msg)
-                
-            except (RuntimeError, ValueError) as e:
-                # Это уже обработанная ошибка от API (error в ответе)
-                # Если это последняя попытка, выбрасываем
-                if attempt >= max_error_attempts:
-                    raise
-                # Иначе продолжаем цикл (уже обработано выше)
-                continue
-                
-            except Exception as e:
-                i18n = get_i18n()
-                last_error = e
-                error_msg = f"{i18n.t('unknown_error')}: {str(e)}"
-                # Неизвестные ошибки - выбрасываем
-                raise RuntimeError(error_msg)
+                # Сетевые ошибки при отправке задачи - не повторяем
+                raise RuntimeError(self._request_error_message(e))
         
-        # Если дошли сюда, значит все попытки исчерпаны
-        if last_error:
-            raise RuntimeError(f"{i18n.t('all_attempts_failed')}: {last_error}")
+        if media_url:
+            self._download_media(media_url, saved_path)
         else:
-            raise RuntimeError(i18n.t('all_attempts_failed'))
-
+            with open(saved_path, 'wb') as f:
+                f.write(media_data)
+        return result, saved_path
+    
+    def _request_once(self, url: str, body: bytes, headers: Dict, output_path: str,
+                      is_video: bool) -> Tuple[Dict, Optional[str], Optional[bytes], str]:
+        """Одна попытка генерации: отправка задачи и ожидание результата
+        
+        Returns:
+            (ответ API, URL результата или None, данные из base64 или None, итоговый путь файла)
+        """
+        session = self._session
+        # Используем большой таймаут для совместимости
+        response = session.post(url, data=body, headers=headers, timeout=3600)
+        if response.status_code >= 400:
+            raise self._http_error(response.status_code, response.text, response.headers.get('Retry-After'))
+        
+        result, api_error = self._parse_result(response.content)
+        if api_error is None and self._is_pending(result):
+            result, api_error = self._unwrap_result(self._poll_prediction(session, result, headers))
+        self._check_api_error(api_error)
+        
+        try:
+            media_url, media_data, output_path = self._resolve_media(result, output_path, is_video)
+        except ValueError as e:
+            # Неожиданный формат (или неполный ответ) - как и раньше, повторяем генерацию
+            raise _RetryableError(str(e), str(e))
+        return result, media_url, media_data, output_path
+    
+    def _download_media(self, media_url: str, output_path: str):
+        """Скачивает готовый результат с повторами только самого скачивания
+        
+        Задача уже выполнена и оплачена, поэтому сбой CDN (5xx, 429, обрыв соединения)
+        не приводит к повторной отправке генерации.
+        """
+        retry_after = None
+        for attempt in range(1, _MAX_ATTEMPTS + 1):
+            if attempt > 1:
+                time.sleep(self._announce_retry(attempt, _MAX_ATTEMPTS, retry_after))
+            try:
+                # Скачиваем потоково: в памяти только текущий блок, а не весь файл
+                with self._session.get(media_url, timeout=300, stream=True) as media_response:
+                    if media_response.status_code >= 500 or media_response.status_code == 429:
+                        raise self._http_error(media_response.status_code, '', media_response.headers.get('Retry-After'))
+                    _raise_for_status(media_response)
+                    with open(output_path, 'wb') as f:
+                        for chunk in media_response.iter_content(chunk_size=_DOWNLOAD_CHUNK_SIZE):
+                            f.write(chunk)
+                return
+            except (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError) as e:
+                error = _RetryableError(self._request_error_message(e), str(e))
+            except _RetryableError as e:
+                error = e
+            except requests.exceptions.RequestException as e:
+                # 4xx и таймаут скачивания - не повторяем
+                raise RuntimeError(self._request_error_message(e))
+            if attempt == _MAX_ATTEMPTS:
+                raise RuntimeError(str(error))
+            self._report_retry(error, attempt, _MAX_ATTEMPTS)
+            retry_after = error.retry_after
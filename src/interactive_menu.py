@@ -4,41 +4,161 @@ Interactive menu for dataset creation configuration
 """
 
 import os
-import re
-from typing import Optional
+import string
+import logging
+import importlib.util
+from typing import List, Optional, Tuple
 
-# Rich для красивого вывода и интерактивного меню
-try:
-    from rich.console import Console
-    from rich.panel import Panel
-    from rich.prompt import Prompt
-    from rich.table import Table
-    from rich import box
-    RICH_AVAILABLE = True
-except ImportError:
-    RICH_AVAILABLE = False
-    # Fallback если rich не установлен
-    class Console:
-        def __init__(self):
-            pass
-        def print(self, *args, **kwargs):
-            print(*args)
-        def clear(self):
-            os.system('clear' if os.name != 'nt' else 'cls')
+# Rich (красивый вывод) и inquirer (выбор стрелками) - опциональные зависимости.
+# Сами модули импортируются при первом показе меню (_load_ui): вместе с зависимостями
+# они заметно замедляют запуск, а без интерактивного меню не нужны
+RICH_AVAILABLE = importlib.util.find_spec('rich') is not None
+INQUIRER_AVAILABLE = importlib.util.find_spec('inquirer') is not None
+
+
+class _PlainConsole:
+    """Fallback если rich не установлен"""
+    def __init__(self):
+        pass
+    def print(self, *args, **kwargs):
+        print(*args)
+    def clear(self):
+        os.system('clear' if os.name != 'nt' else 'cls')
+
+
+Console = _PlainConsole
+
+
+def _load_ui():
+    """Импортирует rich и inquirer (если установлены)"""
+    global RICH_AVAILABLE, INQUIRER_AVAILABLE, Console, Panel, Prompt, Table, box, inquirer
+    if RICH_AVAILABLE and Console is _PlainConsole:
+        try:
+            from rich.console import Console
+            from rich.panel import Panel
+            from rich.prompt import Prompt
+            from rich.table import Table
+            from rich import box
+        except ImportError:
+            RICH_AVAILABLE = False
+    if INQUIRER_AVAILABLE and 'inquirer' not in globals():
+        try:
+            import inquirer
+        except ImportError:
+            INQUIRER_AVAILABLE = False
 
-# Inquirer для выбора стрелками
-try:
-    import inquirer
-    INQUIRER_AVAILABLE = True
-except ImportError:
-    INQUIRER_AVAILABLE = False
 
 # Импорт системы локализации
-from i18n import get_i18n
+from i18n import get_i18n, _l
 
 # Импорт Config
 from .config import Config
 
+log = logging.getLogger(__name__)
+
+# Сообщения повторного запроса (выводятся только при неверном вводе)
+_MSG_SELECT_1_2_OR_3 = _l('please_select_1_2_or_3')
+_MSG_SELECT_1 = _l('please_select_1')
+
+# Варианты выбора в меню: номер -> значение в конфиге (и название для вывода)
+_AI_PROVIDERS = {'1': ('gemini', 'Gemini'), '2': ('openai', 'OpenAI'), '3': ('grok', 'Grok')}
+_PROMPT_TEMPLATES = {'1': 'bulk', '2': 'detailed'}
+_IMAGE_PROVIDERS = {'1': ('wavespeed', 'Wavespeed')}
+_WAVESPEED_MODELS = {
+    '1': 'google/nano-banana-pro/edit',
+    '2': 'bytedance/seedream-v4.5/edit',
+    '3': 'bytedance/seedream-v4/edit',
+    '4': 'alibaba/wan-2.5/image-to-video',
+    '5': 'kwaivgi/kling-v2.6-pro/image-to-video',
+    '6': 'kwaivgi/kling-v2.5-turbo-pro/image-to-video'
+}
+_RESOLUTIONS = {'1': '1k', '2': '2k', '3': '4k'}
+
+# Варианты для выбора стрелками (inquirer), не зависящие от языка
+_WAVESPEED_MODEL_CHOICES = [
+    (f"{model} (⚠️ В разработке)" if 'image-to-video' in model else model, key)
+    for key, model in _WAVESPEED_MODELS.items()
+]
+_RESOLUTION_CHOICES = [
+    ('1k (1920×1920) - Быстрая генерация', '1'),
+    ('2k (2048×2048) - Баланс качества и скорости', '2'),
+    ('4k (4096×4096) - Максимальное качество', '3')
+]
+_CAPTION_PROVIDERS = {'1': 'openai', '2': 'grok'}
+
+# Линии заголовков и разделителей разделов меню
+_HEADER_LINE = "=" * 60
+_SEPARATOR = "-" * 60
+_DIM_SEPARATOR = f"\n[dim]{_SEPARATOR}[/dim]"
+
+# Допустимые символы имени профиля; остальные заменяются на '_'
+_PROFILE_NAME_CHARS = frozenset(string.ascii_letters + string.digits + '_-')
+_PROFILE_NAME_TABLE = str.maketrans({chr(i): '_' for i in range(128) if chr(i) not in _PROFILE_NAME_CHARS})
+
+
+def _sanitize_profile_name(name: str) -> str:
+    """Заменяет недопустимые символы имени профиля на '_'"""
+    if name.isascii():
+        return name.translate(_PROFILE_NAME_TABLE)
+    # Не-ASCII символы (например, кириллица) тоже недопустимы
+    return ''.join(c if c in _PROFILE_NAME_CHARS else '_' for c in name)
+
+
+def _options_table(name_width: int, description_width: int, options: List[Tuple[str, str]]) -> 'Table':
+    """Rich таблица вариантов выбора: [номер], название, описание"""
+    table = Table(show_header=False, box=None, padding=(0, 2))
+    table.add_column("Choice", style="bold yellow", width=5)
+    table.add_column("Option", style="bold", width=name_width)
+    table.add_column("Description", style="", width=description_width)
+    for idx, (name, description) in enumerate(options, 1):
+        table.add_row(f"[bold yellow][{idx}][/bold yellow]", f"[bold]{name}[/bold]", description)
+    return table
+
+
+def _inquirer_choice(i18n, options: List[Tuple[str, str]], has_value: bool) -> str:
+    """Выбор стрелками через inquirer; последний вариант - пропуск (пустая строка)"""
+    question = inquirer.List(
+        'choice',
+        message=f"{i18n.t('your_choice')}",
+        choices=options + [(f"{i18n.t('press_enter_to_skip')}", '')],
+        # Если значение уже есть в конфиге, по умолчанию предлагаем пропуск
+        default='' if has_value else None
+    )
+    answers = inquirer.prompt([question])
+    return answers['choice'] if answers else ''
+
+
+def _print_selected(console: 'Console', i18n, title: str):
+    """Сообщение о выбранном варианте"""
+    if RICH_AVAILABLE:
+        console.print(f"   [green]✓[/green] {i18n.t('selected')}: [bold]{title}[/bold]")
+    else:
+        print(f"   ✓ {i18n.t('selected')}: {title}")
+
+
+def _ask_required_choice(console: 'Console', label: str, choices: Tuple[str, ...], hint: str,
+                         invalid_message: str) -> str:
+    """Повторяет запрос, пока не будет выбран один из вариантов choices (пропуск недоступен)"""
+    valid = frozenset(choices)
+    if RICH_AVAILABLE:
+        prompt = f"   [bold]{label}[/bold]"
+        rich_choices = list(choices)
+        error = f"   [yellow]⚠️  {invalid_message}[/yellow]"
+    else:
+        prompt = f"   {label} ({hint}): "
+        error = f"   ⚠️  {invalid_message}"
+    while True:
+        if RICH_AVAILABLE:
+            choice = Prompt.ask(prompt, choices=rich_choices, default=choices[0])
+        else:
+            choice = input(prompt).strip()
+        if choice in valid:
+            return choice
+        if RICH_AVAILABLE:
+            console.print(error)
+        else:
+            print(error)
+
 
 def select_or_create_profile() -> Optional[str]:
     """Выбор существующего профиля или создание нового"""
@@ -46,9 +166,9 @@ def select_or_create_profile() -> Optional[str]:
     config = Config()
     profiles = config.list_profiles()
     
-    print("\n" + "="*60)
+    print("\n" + _HEADER_LINE)
     print(f"  📋 {i18n.t('profile_management')}")
-    print("="*60)
+    print(_HEADER_LINE)
     
     if profiles:
         print(f"\n{i18n.t('found_profiles', count=len(profiles))}\n")
@@ -86,14 +206,13 @@ def select_or_create_profile() -> Optional[str]:
 def save_profile_menu(config: Config):
     """Меню сохранения профиля"""
     i18n = get_i18n()
-    print("\n" + "="*60)
+    print("\n" + _HEADER_LINE)
     print(f"  💾 {i18n.t('save_profile_title')}")
-    print("="*60)
+    print(_HEADER_LINE)
     print(f"\n{i18n.t('want_to_save_profile')}")
     print(f"   [1] {i18n.t('yes_save')}")
     print(f"   [2] {i18n.t('no_skip')}")
     
-    i18n = get_i18n()
     choice = input(f"\n{i18n.t('your_choice')} (1/2): ").strip()
     
     if choice == '1':
@@ -103,19 +222,16 @@ def save_profile_menu(config: Config):
         profile_name = input(f"{i18n.t('profile_name')}: ").strip()
         
         if not profile_name:
-            i18n = get_i18n()
             print(f"⚠ {i18n.t('profile_name')} не может быть пустым, пропускаем сохранение")
             return
         
         # Очищаем имя от недопустимых символов
-        profile_name = re.sub(r'[^a-zA-Z0-9_-]', '_', profile_name)
+        profile_name = _sanitize_profile_name(profile_name)
         
         # Проверяем, существует ли профиль
-        existing_profiles = config.list_profiles()
-        profile_exists = any(p['file'] == profile_name for p in existing_profiles)
+        profile_exists = config.profile_exists(profile_name)
         
         if profile_exists:
-            i18n = get_i18n()
             print(f"\n⚠ {i18n.t('profile_already_exists', name=profile_name)}")
             print(f"   [1] {i18n.t('overwrite_existing')}")
             print(f"   [2] {i18n.t('cancel_saving')}")
@@ -125,33 +241,35 @@ def save_profile_menu(config: Config):
                 return
         
         # Запрашиваем описание (опционально)
-        i18n = get_i18n()
         print(f"\n{i18n.t('enter_profile_description')}")
         print(f"   {i18n.t('profile_description_example', example='Для генерации постеров с Seedream 4.5')}")
         description = input(f"{i18n.t('enter')}: ").strip()
         
         try:
             profile_path = config.save_to_profile(profile_name, description)
-            i18n = get_i18n()
             if profile_exists:
                 print(f"\n✅ {i18n.t('profile_updated', name=profile_name)}")
             else:
                 print(f"\n✅ {i18n.t('profile_created', name=profile_name)}")
             print(f"   {i18n.t('profile_path', path=profile_path)}")
         except Exception as e:
-            i18n = get_i18n()
             print(f"\n❌ {i18n.t('error_saving_profile', error=e)}")
-            import traceback
-            traceback.print_exc()
+            # Трассировка нужна только для отладки (уровень DEBUG логгера 'src')
+            log.debug("Ошибка сохранения профиля %s", profile_name, exc_info=True)
     else:
-        i18n = get_i18n()
         print(f"\n→ {i18n.t('settings_not_saved')}")
 
 
 def interactive_menu(config: Config) -> Config:
     """Интерактивное меню для выбора настроек"""
+    _load_ui()
     i18n = get_i18n()
-    console = Console() if RICH_AVAILABLE else Console()
+    console = Console()
+    # Общие подписи повторяются в каждом блоке меню, язык внутри меню не меняется
+    choice_label = i18n.t('your_choice')
+    current_label = i18n.t('current_value')
+    using_label = i18n.t('using_value')
+    skip_hint = f"{i18n.t('or')} {i18n.t('press_enter_to_skip')}"
     
     # Заголовок меню
     if RICH_AVAILABLE:
@@ -163,11 +281,11 @@ def interactive_menu(config: Config) -> Config:
         ))
         console.print(f"\n[dim]{i18n.t('select_settings')}[/dim]\n")
     else:
-        print("\n" + "="*60)
+        print("\n" + _HEADER_LINE)
         print(f"  🎨 {i18n.t('interactive_menu_title')}")
-        print("="*60)
+        print(_HEADER_LINE)
         print(f"\n{i18n.t('select_settings')}\n")
-        print("="*60)
+        print(_HEADER_LINE)
     
     # Вопрос о NSFW контенте в самом начале
     if RICH_AVAILABLE:
@@ -179,7 +297,7 @@ def interactive_menu(config: Config) -> Config:
         table.add_row("[1]", "Да, буду генерировать NSFW контент")
         table.add_row("[2]", "Нет, только обычный контент")
         console.print(table)
-        nsfw_choice = Prompt.ask(f"\n   [bold]Ваш выбор[/bold]", choices=["1", "2", ""], default="", show_choices=False).strip()
+        nsfw_choice = Prompt.ask(f"\n   [bold]Ваш выбор[/bold]", choices=["1", "2", ""], default="", show_choices=False)
     else:
         print("\n🔞 Будете ли вы генерировать NSFW контент?")
         print("Если да, для NSFW контента автоматически будут выбраны: Grok (промпты) и Seedream v4.5 (генерация)\n")
@@ -212,41 +330,26 @@ def interactive_menu(config: Config) -> Config:
         else:
             console.print(f"\n[bold cyan]1️⃣  {i18n.t('ai_provider')}:[/bold cyan]")
         current_ai = config.ai_provider if config.ai_provider else i18n.t('not_selected')
-        console.print(f"   [dim]{i18n.t('current_value')}: {current_ai}[/dim]")
+        console.print(f"   [dim]{current_label}: {current_ai}[/dim]")
         
         # Создаем таблицу с опциями
-        table = Table(show_header=False, box=None, padding=(0, 2))
-        table.add_column("Choice", style="bold yellow", width=5)
-        table.add_column("Provider", style="bold", width=25)
-        table.add_column("Description", style="", width=50)
-        
-        table.add_row(
-            "[bold yellow][1][/bold yellow]",
-            "[bold]Gemini[/bold]",
-            f"[green]✓[/green] {i18n.t('gemini_description_1')} | [green]✓[/green] {i18n.t('gemini_description_2')}"
-        )
-        table.add_row(
-            "[bold yellow][2][/bold yellow]",
-            "[bold]OpenAI[/bold]",
-            f"[green]✓[/green] {i18n.t('openai_description_1')} | [green]✓[/green] {i18n.t('openai_description_2')}"
-        )
-        table.add_row(
-            "[bold yellow][3][/bold yellow]",
-            "[bold]Grok[/bold]",
-            f"[green]✓[/green] {i18n.t('grok_description_1')} | [green]✓[/green] {i18n.t('grok_description_7')}"
-        )
+        table = _options_table(25, 50, [
+            ("Gemini", f"[green]✓[/green] {i18n.t('gemini_description_1')} | [green]✓[/green] {i18n.t('gemini_description_2')}"),
+            ("OpenAI", f"[green]✓[/green] {i18n.t('openai_description_1')} | [green]✓[/green] {i18n.t('openai_description_2')}"),
+            ("Grok", f"[green]✓[/green] {i18n.t('grok_description_1')} | [green]✓[/green] {i18n.t('grok_description_7')}")
+        ])
         console.print(table)
         
         choice = Prompt.ask(
-            f"\n   [bold]{i18n.t('your_choice')}[/bold]",
+            f"\n   [bold]{choice_label}[/bold]",
             choices=["1", "2", "3", ""],
             default="",
             show_choices=False
-        ).strip()
+        )
     else:
         print(f"\n1️⃣  {i18n.t('ai_provider')}:")
         current_ai = config.ai_provider if config.ai_provider else i18n.t('not_selected')
-        print(f"   {i18n.t('current_value')}: {current_ai}")
+        print(f"   {current_label}: {current_ai}")
         print(f"\n   [1] Gemini (Google Gemini 2.5 Flash)")
         print(f"       ✓ {i18n.t('gemini_description_1')}")
         print(f"       ✓ {i18n.t('gemini_description_2')}")
@@ -270,127 +373,61 @@ def interactive_menu(config: Config) -> Config:
         print(f"       ⚠️  {i18n.t('grok_description_5')}")
         print(f"       💡 {i18n.t('grok_description_6')}")
         print(f"       🔥 {i18n.t('grok_description_7')}")
-        choice = input(f"\n   {i18n.t('your_choice')} (1/2/3 {i18n.t('or')} {i18n.t('press_enter_to_skip')}): ").strip()
-    if choice == '1':
-        config.ai_provider = 'gemini'
-        if RICH_AVAILABLE:
-            console.print(f"   [green]✓[/green] {i18n.t('selected')}: [bold]Gemini[/bold]")
-        else:
-            print(f"   ✓ {i18n.t('selected')}: Gemini")
-    elif choice == '2':
-        config.ai_provider = 'openai'
-        if RICH_AVAILABLE:
-            console.print(f"   [green]✓[/green] {i18n.t('selected')}: [bold]OpenAI[/bold]")
-        else:
-            print(f"   ✓ {i18n.t('selected')}: OpenAI")
-    elif choice == '3':
-        config.ai_provider = 'grok'
-        if RICH_AVAILABLE:
-            console.print(f"   [green]✓[/green] {i18n.t('selected')}: [bold]Grok[/bold]")
-        else:
-            print(f"   ✓ {i18n.t('selected')}: Grok")
-    else:
+        choice = input(f"\n   {choice_label} (1/2/3 {skip_hint}): ").strip()
+    if choice not in _AI_PROVIDERS:
         if config.ai_provider:
             if RICH_AVAILABLE:
-                console.print(f"   [dim]→ {i18n.t('using_value')}: {config.ai_provider}[/dim]")
+                console.print(f"   [dim]→ {using_label}: {config.ai_provider}[/dim]")
             else:
-                print(f"   → {i18n.t('using_value')}: {config.ai_provider}")
+                print(f"   → {using_label}: {config.ai_provider}")
         else:
             if RICH_AVAILABLE:
                 console.print(f"   [yellow]⚠️  {i18n.t('ai_provider')} {i18n.t('not_selected')}! {i18n.t('select_option')}.[/yellow]")
             else:
                 print(f"   ⚠️  {i18n.t('ai_provider')} {i18n.t('not_selected')}! {i18n.t('select_option')}.")
             # Повторяем запрос если не выбран
-            while not config.ai_provider:
-                if RICH_AVAILABLE:
-                    choice = Prompt.ask(
-                        f"   [bold]{i18n.t('your_choice')}[/bold]",
-                        choices=["1", "2", "3"],
-                        default="1"
-                    ).strip()
-                else:
-                    choice = input(f"   {i18n.t('your_choice')} (1/2/3, {i18n.t('must_select')}): ").strip()
-                if choice == '1':
-                    config.ai_provider = 'gemini'
-                    if RICH_AVAILABLE:
-                        console.print(f"   [green]✓[/green] {i18n.t('selected')}: [bold]Gemini[/bold]")
-                    else:
-                        print(f"   ✓ {i18n.t('selected')}: Gemini")
-                elif choice == '2':
-                    config.ai_provider = 'openai'
-                    if RICH_AVAILABLE:
-                        console.print(f"   [green]✓[/green] {i18n.t('selected')}: [bold]OpenAI[/bold]")
-                    else:
-                        print(f"   ✓ {i18n.t('selected')}: OpenAI")
-                elif choice == '3':
-                    config.ai_provider = 'grok'
-                    if RICH_AVAILABLE:
-                        console.print(f"   [green]✓[/green] {i18n.t('selected')}: [bold]Grok[/bold]")
-                    else:
-                        print(f"   ✓ {i18n.t('selected')}: Grok")
-                else:
-                    if RICH_AVAILABLE:
-                        console.print(f"   [yellow]⚠️  {i18n.t('please_select_1_2_or_3')}[/yellow]")
-                    else:
-                        print(f"   ⚠️  {i18n.t('please_select_1_2_or_3')}")
+            choice = _ask_required_choice(console, choice_label, tuple(_AI_PROVIDERS),
+                                          f"1/2/3, {i18n.t('must_select')}", _MSG_SELECT_1_2_OR_3)
+    if choice in _AI_PROVIDERS:
+        config.ai_provider, title = _AI_PROVIDERS[choice]
+        _print_selected(console, i18n, title)
     
     if RICH_AVAILABLE:
-        console.print("\n[dim]" + "-"*60 + "[/dim]")
+        console.print(_DIM_SEPARATOR)
     else:
-        print("\n" + "-"*60)
+        print("\n" + _SEPARATOR)
     
     # Выбор шаблона промпта
     if RICH_AVAILABLE:
         console.print(f"\n[bold cyan]2️⃣  {i18n.t('processing_mode')}:[/bold cyan]")
         current_template = config.prompt_template if hasattr(config, 'prompt_template') and config.prompt_template else "bulk"
-        console.print(f"   [dim]{i18n.t('current_value')}: {current_template}[/dim]")
+        console.print(f"   [dim]{current_label}: {current_template}[/dim]")
         console.print(f"\n   [yellow]⚠️  {i18n.t('prompt_same_note')}[/yellow]")
         console.print(f"   [dim]{i18n.t('prompt_difference_note')}[/dim]\n")
         
-        table = Table(show_header=False, box=None, padding=(0, 2))
-        table.add_column("Choice", style="bold yellow", width=5)
-        table.add_column("Mode", style="bold", width=30)
-        table.add_column("Description", style="", width=45)
-        
-        table.add_row(
-            "[bold yellow][1][/bold yellow]",
-            "[bold]bulk[/bold]",
-            f"[blue]📊[/blue] {i18n.t('bulk_mode_1')} | [green]✓[/green] {i18n.t('bulk_mode_4')}"
-        )
-        table.add_row(
-            "[bold yellow][2][/bold yellow]",
-            "[bold]detailed[/bold]",
-            f"[blue]📊[/blue] {i18n.t('detailed_mode_1')} | [green]✓[/green] {i18n.t('detailed_mode_4')}"
-        )
+        table = _options_table(30, 45, [
+            ("bulk", f"[blue]📊[/blue] {i18n.t('bulk_mode_1')} | [green]✓[/green] {i18n.t('bulk_mode_4')}"),
+            ("detailed", f"[blue]📊[/blue] {i18n.t('detailed_mode_1')} | [green]✓[/green] {i18n.t('detailed_mode_4')}")
+        ])
         console.print(table)
         
         # Используем inquirer для выбора стрелками, если доступен
         if INQUIRER_AVAILABLE:
-            questions = [
-                inquirer.List(
-                    'choice',
-                    message=f"{i18n.t('your_choice')}",
-                    choices=[
-                        (f"{i18n.t('bulk_mode_title')} - {i18n.t('bulk_mode_1')}", '1'),
-                        (f"{i18n.t('detailed_mode_title')} - {i18n.t('detailed_mode_1')}", '2'),
-                        (f"{i18n.t('press_enter_to_skip')}", '')
-                    ],
-                    default='' if config.prompt_template else None
-                )
-            ]
-            answers = inquirer.prompt(questions)
-            choice = answers['choice'] if answers else ''
+            choice = _inquirer_choice(i18n, [
+                (f"{i18n.t('bulk_mode_title')} - {i18n.t('bulk_mode_1')}", '1'),
+                (f"{i18n.t('detailed_mode_title')} - {i18n.t('detailed_mode_1')}", '2')
+            ], bool(config.prompt_template))
         else:
             choice = Prompt.ask(
-                f"\n   [bold]{i18n.t('your_choice')}[/bold]",
+                f"\n   [bold]{choice_label}[/bold]",
                 choices=["1", "2", ""],
                 default="",
                 show_choices=False
-            ).strip()
+            )
     else:
         print(f"\n2️⃣  {i18n.t('processing_mode')}:")
         current_template = config.prompt_template if hasattr(config, 'prompt_template') and config.prompt_template else "bulk"
-        print(f"   {i18n.t('current_value')}: {current_template}")
+        print(f"   {current_label}: {current_template}")
         print(f"\n   ⚠️  {i18n.t('prompt_same_note')}")
         print(f"   {i18n.t('prompt_difference_note')}\n")
         print(f"   [1] {i18n.t('bulk_mode_title')}")
@@ -407,29 +444,20 @@ def interactive_menu(config: Config) -> Config:
         print(f"       ✓ {i18n.t('detailed_mode_4')}")
         print(f"       ✓ {i18n.t('detailed_mode_5')}")
         print(f"       💡 {i18n.t('detailed_mode_6')}")
-        choice = input(f"\n   {i18n.t('your_choice')} (1/2 {i18n.t('or')} {i18n.t('press_enter_to_skip')}): ").strip()
-    if choice == '1':
-        config.prompt_template = 'bulk'
-        if RICH_AVAILABLE:
-            console.print(f"   [green]✓[/green] {i18n.t('selected')}: [bold]bulk[/bold]")
-        else:
-            print(f"   ✓ {i18n.t('selected')}: bulk")
-    elif choice == '2':
-        config.prompt_template = 'detailed'
-        if RICH_AVAILABLE:
-            console.print(f"   [green]✓[/green] {i18n.t('selected')}: [bold]detailed[/bold]")
-        else:
-            print(f"   ✓ {i18n.t('selected')}: detailed")
+        choice = input(f"\n   {choice_label} (1/2 {skip_hint}): ").strip()
+    if choice in _PROMPT_TEMPLATES:
+        config.prompt_template = _PROMPT_TEMPLATES[choice]
+        _print_selected(console, i18n, config.prompt_template)
     else:
         if RICH_AVAILABLE:
-            console.print(f"   [dim]→ {i18n.t('using_value')} из config: {config.prompt_template}[/dim]")
+            console.print(f"   [dim]→ {using_label} из config: {config.prompt_template}[/dim]")
         else:
-            print(f"   → {i18n.t('using_value')} из config: {config.prompt_template}")
+            print(f"   → {using_label} из config: {config.prompt_template}")
     
     if RICH_AVAILABLE:
-        console.print("\n[dim]" + "-"*60 + "[/dim]")
+        console.print(_DIM_SEPARATOR)
     else:
-        print("\n" + "-"*60)
+        print("\n" + _SEPARATOR)
     
     # Выбор провайдера генерации
     # Если NSFW выбран - это настройки для обычного контента
@@ -439,7 +467,7 @@ def interactive_menu(config: Config) -> Config:
         else:
             console.print(f"\n[bold cyan]3️⃣  {i18n.t('image_generation_provider')}:[/bold cyan]")
         current_provider = config.image_provider if config.image_provider else i18n.t('not_selected')
-        console.print(f"   [dim]{i18n.t('current_value')}: {current_provider}[/dim]")
+        console.print(f"   [dim]{current_label}: {current_provider}[/dim]")
         console.print(f"\n   [bold yellow][1][/bold yellow] [bold]Wavespeed[/bold]")
         console.print(f"       [green]✓[/green] {i18n.t('wavespeed_description_1')}")
         console.print(f"       [green]✓[/green] {i18n.t('wavespeed_description_2')}")
@@ -449,30 +477,20 @@ def interactive_menu(config: Config) -> Config:
         console.print(f"       [blue]💡[/blue] {i18n.t('wavespeed_description_6')}")
         # Используем inquirer для выбора стрелками, если доступен
         if INQUIRER_AVAILABLE:
-            questions = [
-                inquirer.List(
-                    'choice',
-                    message=f"{i18n.t('your_choice')}",
-                    choices=[
-                        ('Wavespeed', '1'),
-                        (f"{i18n.t('press_enter_to_skip')}", '')
-                    ],
-                    default='' if config.image_provider else None
-                )
-            ]
-            answers = inquirer.prompt(questions)
-            choice = answers['choice'] if answers else ''
+            choice = _inquirer_choice(i18n, [
+                ('Wavespeed', '1')
+            ], bool(config.image_provider))
         else:
             choice = Prompt.ask(
-                f"\n   [bold]{i18n.t('your_choice')}[/bold]",
+                f"\n   [bold]{choice_label}[/bold]",
                 choices=["1", ""],
                 default="",
                 show_choices=False
-            ).strip()
+            )
     else:
         print(f"\n3️⃣  {i18n.t('image_generation_provider')}:")
         current_provider = config.image_provider if config.image_provider else i18n.t('not_selected')
-        print(f"   {i18n.t('current_value')}: {current_provider}")
+        print(f"   {current_label}: {current_provider}")
         print(f"\n   [1] Wavespeed")
         print(f"       ✓ {i18n.t('wavespeed_description_1')}")
         print(f"       ✓ {i18n.t('wavespeed_description_2')}")
@@ -480,98 +498,50 @@ def interactive_menu(config: Config) -> Config:
         print(f"       ✓ {i18n.t('wavespeed_description_4')}")
         print(f"       ✓ {i18n.t('wavespeed_description_5')}")
         print(f"       💡 {i18n.t('wavespeed_description_6')}")
-        choice = input(f"\n   {i18n.t('your_choice')} (1 {i18n.t('or')} {i18n.t('press_enter_to_skip')}): ").strip()
-    if choice == '1':
-        config.image_provider = 'wavespeed'
-        if RICH_AVAILABLE:
-            console.print(f"   [green]✓[/green] {i18n.t('selected')}: [bold]Wavespeed[/bold]")
-        else:
-            print(f"   ✓ {i18n.t('selected')}: Wavespeed")
-    else:
+        choice = input(f"\n   {choice_label} (1 {skip_hint}): ").strip()
+    if choice not in _IMAGE_PROVIDERS:
         if config.image_provider:
             if RICH_AVAILABLE:
-                console.print(f"   [dim]→ {i18n.t('using_value')}: {config.image_provider}[/dim]")
+                console.print(f"   [dim]→ {using_label}: {config.image_provider}[/dim]")
             else:
-                print(f"   → {i18n.t('using_value')}: {config.image_provider}")
+                print(f"   → {using_label}: {config.image_provider}")
         else:
             if RICH_AVAILABLE:
                 console.print(f"   [yellow]⚠️  {i18n.t('image_generation_provider')} {i18n.t('not_selected')}! {i18n.t('select_option')}.[/yellow]")
             else:
                 print(f"   ⚠️  {i18n.t('image_generation_provider')} {i18n.t('not_selected')}! {i18n.t('select_option')}.")
             # Повторяем запрос если не выбран
-            while not config.image_provider:
-                if RICH_AVAILABLE:
-                    choice = Prompt.ask(
-                        f"   [bold]{i18n.t('your_choice')}[/bold]",
-                        choices=["1"],
-                        default="1"
-                    ).strip()
-                else:
-                    choice = input(f"   {i18n.t('your_choice')} (1, {i18n.t('must_select')}): ").strip()
-                if choice == '1':
-                    config.image_provider = 'wavespeed'
-                    if RICH_AVAILABLE:
-                        console.print(f"   [green]✓[/green] {i18n.t('selected')}: [bold]Wavespeed[/bold]")
-                    else:
-                        print(f"   ✓ {i18n.t('selected')}: Wavespeed")
-                else:
-                    if RICH_AVAILABLE:
-                        console.print(f"   [yellow]⚠️  {i18n.t('please_select_1')}[/yellow]")
-                    else:
-                        print(f"   ⚠️  {i18n.t('please_select_1')}")
+            choice = _ask_required_choice(console, choice_label, tuple(_IMAGE_PROVIDERS),
+                                          f"1, {i18n.t('must_select')}", _MSG_SELECT_1)
+    if choice in _IMAGE_PROVIDERS:
+        config.image_provider, title = _IMAGE_PROVIDERS[choice]
+        _print_selected(console, i18n, title)
     
     if RICH_AVAILABLE:
-        console.print("\n[dim]" + "-"*60 + "[/dim]")
+        console.print(_DIM_SEPARATOR)
     else:
-        print("\n" + "-"*60)
+        print("\n" + _SEPARATOR)
     
     # Выбор модели Wavespeed
     # Если NSFW выбран - это настройки для обычного контента
     if config.image_provider == 'wavespeed':
         if RICH_AVAILABLE:
-            console.print("\n[dim]" + "-"*60 + "[/dim]")
+            console.print(_DIM_SEPARATOR)
             if nsfw_choice == '1':
                 console.print(f"\n[bold cyan]4️⃣  {i18n.t('wavespeed_model')} (для обычного контента):[/bold cyan]")
             else:
                 console.print(f"\n[bold cyan]4️⃣  {i18n.t('wavespeed_model')}:[/bold cyan]")
-            console.print(f"   [dim]{i18n.t('current_value')}: {config.wavespeed_model}[/dim]")
+            console.print(f"   [dim]{current_label}: {config.wavespeed_model}[/dim]")
             
             # Создаем таблицу с моделями
-            table = Table(show_header=False, box=None, padding=(0, 2))
-            table.add_column("Choice", style="bold yellow", width=5)
-            table.add_column("Model", style="bold", width=40)
-            table.add_column("Key Features", style="", width=35)
-            
-            table.add_row(
-                "[bold yellow][1][/bold yellow]",
-                "[bold]google/nano-banana-pro/edit[/bold]",
-                f"[green]•[/green] {i18n.t('nano_banana_1')} | [green]•[/green] {i18n.t('nano_banana_5')}"
-            )
-            table.add_row(
-                "[bold yellow][2][/bold yellow]",
-                "[bold]bytedance/seedream-v4.5/edit[/bold]",
-                f"[green]•[/green] {i18n.t('seedream_v45_1')} | [green]•[/green] {i18n.t('seedream_v45_6')}"
-            )
-            table.add_row(
-                "[bold yellow][3][/bold yellow]",
-                "[bold]bytedance/seedream-v4/edit[/bold]",
-                f"[green]•[/green] {i18n.t('seedream_v4_1')} | [green]•[/green] {i18n.t('seedream_v4_6')}"
-            )
-            table.add_row(
-                "[bold yellow][4][/bold yellow]",
-                "[bold]alibaba/wan-2.5/image-to-video[/bold]",
-                f"[green]•[/green] {i18n.t('wan_25_1')} | [dim]⚠️ В разработке[/dim]"
-            )
-            table.add_row(
-                "[bold yellow][5][/bold yellow]",
-                "[bold]kwaivgi/kling-v2.6-pro/image-to-video[/bold]",
-                f"[green]•[/green] {i18n.t('kling_v26_1')} | [dim]⚠️ В разработке[/dim]"
-            )
-            table.add_row(
-                "[bold yellow][6][/bold yellow]",
-                "[bold]kwaivgi/kling-v2.5-turbo-pro/image-to-video[/bold]",
-                f"[green]•[/green] {i18n.t('kling_v25_1')} | [dim]⚠️ В разработке[/dim]"
-            )
+            table = _options_table(40, 35, [
+                ("google/nano-banana-pro/edit", f"[green]•[/green] {i18n.t('nano_banana_1')} | [green]•[/green] {i18n.t('nano_banana_5')}"),
+                ("bytedance/seedream-v4.5/edit", f"[green]•[/green] {i18n.t('seedream_v45_1')} | [green]•[/green] {i18n.t('seedream_v45_6')}"),
+                ("bytedance/seedream-v4/edit", f"[green]•[/green] {i18n.t('seedream_v4_1')} | [green]•[/green] {i18n.t('seedream_v4_6')}"),
+                ("alibaba/wan-2.5/image-to-video", f"[green]•[/green] {i18n.t('wan_25_1')} | [dim]⚠️ В разработке[/dim]"),
+                ("kwaivgi/kling-v2.6-pro/image-to-video", f"[green]•[/green] {i18n.t('kling_v26_1')} | [dim]⚠️ В разработке[/dim]"),
+                ("kwaivgi/kling-v2.5-turbo-pro/image-to-video", f"[green]•[/green] {i18n.t('kling_v25_1')} | [dim]⚠️ В разработке[/dim]")
+            ])
             console.print(f"\n   [bold]{i18n.t('image_to_image')}[/bold]")
             console.print(table)
             console.print(f"\n   [dim]{i18n.t('image_to_video')}[/dim]")
@@ -579,34 +549,17 @@ def interactive_menu(config: Config) -> Config:
             
             # Используем inquirer для выбора стрелками, если доступен
             if INQUIRER_AVAILABLE:
-                questions = [
-                    inquirer.List(
-                        'choice',
-                        message=f"{i18n.t('your_choice')}",
-                        choices=[
-                            ('google/nano-banana-pro/edit', '1'),
-                            ('bytedance/seedream-v4.5/edit', '2'),
-                            ('bytedance/seedream-v4/edit', '3'),
-                            ('alibaba/wan-2.5/image-to-video (⚠️ В разработке)', '4'),
-                            ('kwaivgi/kling-v2.6-pro/image-to-video (⚠️ В разработке)', '5'),
-                            ('kwaivgi/kling-v2.5-turbo-pro/image-to-video (⚠️ В разработке)', '6'),
-                            (f"{i18n.t('press_enter_to_skip')}", '')
-                        ],
-                        default='' if config.wavespeed_model else None
-                    )
-                ]
-                answers = inquirer.prompt(questions)
-                choice = answers['choice'] if answers else ''
+                choice = _inquirer_choice(i18n, _WAVESPEED_MODEL_CHOICES, bool(config.wavespeed_model))
             else:
                 choice = Prompt.ask(
-                    f"\n   [bold]{i18n.t('your_choice')}[/bold]",
+                    f"\n   [bold]{choice_label}[/bold]",
                     choices=["1", "2", "3", "4", "5", "6", ""],
                     default="",
                     show_choices=False
-                ).strip()
+                )
         else:
             print(f"\n4️⃣  {i18n.t('wavespeed_model')}:")
-            print(f"   {i18n.t('current_value')}: {config.wavespeed_model}")
+            print(f"   {current_label}: {config.wavespeed_model}")
             print(f"\n   {i18n.t('image_to_image')}")
             print("      [1] google/nano-banana-pro/edit")
             print(f"         • {i18n.t('nano_banana_1')}")
@@ -647,59 +600,32 @@ def interactive_menu(config: Config) -> Config:
             print(f"         • {i18n.t('kling_v25_3')}")
             print(f"         • {i18n.t('kling_v25_4')}")
             choice = input("\n   Ваш выбор (1-6 или Enter для пропуска): ").strip()
-        models = {
-            '1': 'google/nano-banana-pro/edit',
-            '2': 'bytedance/seedream-v4.5/edit',
-            '3': 'bytedance/seedream-v4/edit',
-            '4': 'alibaba/wan-2.5/image-to-video',
-            '5': 'kwaivgi/kling-v2.6-pro/image-to-video',
-            '6': 'kwaivgi/kling-v2.5-turbo-pro/image-to-video'
-        }
-        if choice in models:
-            config.wavespeed_model = models[choice]
-            print(f"   ✓ {i18n.t('selected')}: {config.wavespeed_model}")
-        else:
+        if choice not in _WAVESPEED_MODELS:
             if config.wavespeed_model:
-                print(f"   → {i18n.t('using_value')}: {config.wavespeed_model}")
+                print(f"   → {using_label}: {config.wavespeed_model}")
             else:
                 print(f"   ⚠️  {i18n.t('wavespeed_model')} {i18n.t('not_selected')}! {i18n.t('select_option')}.")
                 # Повторяем запрос если не выбрана
-                while not config.wavespeed_model:
-                    choice = input(f"   {i18n.t('your_choice')} (1-6, {i18n.t('must_select')}): ").strip()
-                    if choice in models:
-                        config.wavespeed_model = models[choice]
-                        print(f"   ✓ {i18n.t('selected')}: {config.wavespeed_model}")
-                    else:
-                        print(f"   ⚠️  {i18n.t('please_select_1_or_2')} (1-6)")
+                choice = _ask_required_choice(console, choice_label, tuple(_WAVESPEED_MODELS),
+                                              f"1-6, {i18n.t('must_select')}", f"{i18n.t('please_select_1_or_2')} (1-6)")
+        if choice in _WAVESPEED_MODELS:
+            config.wavespeed_model = _WAVESPEED_MODELS[choice]
+            print(f"   ✓ {i18n.t('selected')}: {config.wavespeed_model}")
         
         # Дополнительные настройки для Wavespeed
         # Настройки разрешения для Nano Banana Pro и Seedream моделей
         if 'edit' in config.wavespeed_model or 'seedream' in config.wavespeed_model.lower():
             if RICH_AVAILABLE:
-                console.print("\n[dim]" + "-"*60 + "[/dim]")
+                console.print(_DIM_SEPARATOR)
                 console.print(f"\n[bold cyan]5️⃣  {i18n.t('wavespeed_resolution')}:[/bold cyan]")
-                console.print(f"   [dim]{i18n.t('current_value')}: {config.wavespeed_resolution}[/dim]")
+                console.print(f"   [dim]{current_label}: {config.wavespeed_resolution}[/dim]")
             else:
-                print("\n" + "-"*60)
+                print("\n" + _SEPARATOR)
                 print(f"\n5️⃣  {i18n.t('wavespeed_resolution')}:")
-                print(f"   {i18n.t('current_value')}: {config.wavespeed_resolution}")
+                print(f"   {current_label}: {config.wavespeed_resolution}")
             
             if INQUIRER_AVAILABLE:
-                questions = [
-                    inquirer.List(
-                        'choice',
-                        message=f"{i18n.t('your_choice')}",
-                        choices=[
-                            ('1k (1920×1920) - Быстрая генерация', '1'),
-                            ('2k (2048×2048) - Баланс качества и скорости', '2'),
-                            ('4k (4096×4096) - Максимальное качество', '3'),
-                            (f"{i18n.t('press_enter_to_skip')}", '')
-                        ],
-                        default='' if config.wavespeed_resolution else None
-                    )
-                ]
-                answers = inquirer.prompt(questions)
-                choice = answers['choice'] if answers else ''
+                choice = _inquirer_choice(i18n, _RESOLUTION_CHOICES, bool(config.wavespeed_resolution))
             else:
                 if RICH_AVAILABLE:
                     console.print("\n   [bold yellow][1][/bold yellow] [bold]1k[/bold] (1920×1920)")
@@ -717,11 +643,11 @@ def interactive_menu(config: Config) -> Config:
                     console.print(f"       [yellow]⚠️[/yellow]  {i18n.t('resolution_4k_3')}")
                     console.print(f"       [blue]💡[/blue] {i18n.t('resolution_4k_4')}")
                     choice = Prompt.ask(
-                        f"\n   [bold]{i18n.t('your_choice')}[/bold]",
+                        f"\n   [bold]{choice_label}[/bold]",
                         choices=["1", "2", "3", ""],
                         default="",
                         show_choices=False
-                    ).strip()
+                    )
                 else:
                     print("\n   [1] 1k (1920×1920 или аналогичное)")
                     print(f"       ✓ {i18n.t('resolution_1k_1')}")
@@ -737,25 +663,21 @@ def interactive_menu(config: Config) -> Config:
                     print(f"       ✓ {i18n.t('resolution_4k_2')}")
                     print(f"       ⚠️  {i18n.t('resolution_4k_3')}")
                     print(f"       💡 {i18n.t('resolution_4k_4')}")
-                    choice = input(f"\n   {i18n.t('your_choice')} (1-3 {i18n.t('or')} {i18n.t('press_enter_to_skip')}): ").strip()
+                    choice = input(f"\n   {choice_label} (1-3 {skip_hint}): ").strip()
             
-            resolutions = {'1': '1k', '2': '2k', '3': '4k'}
-            if choice in resolutions:
-                config.wavespeed_resolution = resolutions[choice]
-                if RICH_AVAILABLE:
-                    console.print(f"   [green]✓[/green] {i18n.t('selected')}: [bold]{config.wavespeed_resolution}[/bold]")
-                else:
-                    print(f"   ✓ {i18n.t('selected')}: {config.wavespeed_resolution}")
+            if choice in _RESOLUTIONS:
+                config.wavespeed_resolution = _RESOLUTIONS[choice]
+                _print_selected(console, i18n, config.wavespeed_resolution)
             else:
                 if RICH_AVAILABLE:
-                    console.print(f"   [dim]→ {i18n.t('using_value')} из config: {config.wavespeed_resolution}[/dim]")
+                    console.print(f"   [dim]→ {using_label} из config: {config.wavespeed_resolution}[/dim]")
                 else:
-                    print(f"   → {i18n.t('using_value')} из config: {config.wavespeed_resolution}")
+                    print(f"   → {using_label} из config: {config.wavespeed_resolution}")
     
     if RICH_AVAILABLE:
-        console.print("\n[dim]" + "-"*60 + "[/dim]")
+        console.print(_DIM_SEPARATOR)
     else:
-        print("\n" + "-"*60)
+        print("\n" + _SEPARATOR)
     
     # Настройки для генерации captions (LoRA)
     # Если NSFW выбран - это настройки для обычного контента
@@ -765,29 +687,19 @@ def interactive_menu(config: Config) -> Config:
         else:
             console.print(f"\n[bold cyan]6️⃣  {i18n.t('caption_generation')}:[/bold cyan]")
         current_generate = i18n.t('yes') if config.generate_captions else i18n.t('no')
-        console.print(f"   [dim]{i18n.t('current_value')}: {current_generate}[/dim]")
+        console.print(f"   [dim]{current_label}: {current_generate}[/dim]")
         console.print(f"\n   {i18n.t('caption_generation_desc')}")
     else:
         print(f"\n6️⃣  {i18n.t('caption_generation')}:")
         current_generate = i18n.t('yes') if config.generate_captions else i18n.t('no')
-        print(f"   {i18n.t('current_value')}: {current_generate}")
+        print(f"   {current_label}: {current_generate}")
         print(f"\n   {i18n.t('caption_generation_desc')}")
     
     if INQUIRER_AVAILABLE:
-        questions = [
-            inquirer.List(
-                'choice',
-                message=f"{i18n.t('your_choice')}",
-                choices=[
-                    (f"{i18n.t('caption_generation_yes')} - {i18n.t('caption_yes_1')}", '1'),
-                    (f"{i18n.t('caption_generation_no')} - {i18n.t('caption_no_1')}", '2'),
-                    (f"{i18n.t('press_enter_to_skip')}", '')
-                ],
-                default='' if config.generate_captions else None
-            )
-        ]
-        answers = inquirer.prompt(questions)
-        choice = answers['choice'] if answers else ''
+        choice = _inquirer_choice(i18n, [
+            (f"{i18n.t('caption_generation_yes')} - {i18n.t('caption_yes_1')}", '1'),
+            (f"{i18n.t('caption_generation_no')} - {i18n.t('caption_no_1')}", '2')
+        ], bool(config.generate_captions))
     else:
         if RICH_AVAILABLE:
             console.print(f"\n   [bold yellow][1][/bold yellow] [bold]{i18n.t('caption_generation_yes')}[/bold]")
@@ -802,11 +714,11 @@ def interactive_menu(config: Config) -> Config:
             console.print(f"       [green]✓[/green] {i18n.t('caption_no_2')}")
             console.print(f"       [blue]💡[/blue] {i18n.t('caption_no_3')}")
             choice = Prompt.ask(
-                f"\n   [bold]{i18n.t('your_choice')}[/bold]",
+                f"\n   [bold]{choice_label}[/bold]",
                 choices=["1", "2", ""],
                 default="",
                 show_choices=False
-            ).strip()
+            )
         else:
             print(f"\n   [1] {i18n.t('caption_generation_yes')}")
             print(f"       ✓ {i18n.t('caption_yes_1')}")
@@ -819,7 +731,7 @@ def interactive_menu(config: Config) -> Config:
             print(f"       ✓ {i18n.t('caption_no_1')}")
             print(f"       ✓ {i18n.t('caption_no_2')}")
             print(f"       💡 {i18n.t('caption_no_3')}")
-            choice = input(f"\n   {i18n.t('your_choice')} (1/2 {i18n.t('or')} {i18n.t('press_enter_to_skip')}): ").strip()
+            choice = input(f"\n   {choice_label} (1/2 {skip_hint}): ").strip()
     if choice == '1':
         config.generate_captions = True
         if RICH_AVAILABLE:
@@ -828,15 +740,15 @@ def interactive_menu(config: Config) -> Config:
             print(f"   ✓ {i18n.t('caption_enabled')}")
         
         if RICH_AVAILABLE:
-            console.print("\n[dim]" + "-"*60 + "[/dim]")
+            console.print(_DIM_SEPARATOR)
         else:
-            print("\n" + "-"*60)
+            print("\n" + _SEPARATOR)
         
         # Запрашиваем trigger name
         if RICH_AVAILABLE:
             console.print(f"\n[bold cyan]7️⃣  {i18n.t('trigger_name_prompt')}:[/bold cyan]")
             current_trigger = config.trigger_name if config.trigger_name else i18n.t('not_selected')
-            console.print(f"   [dim]{i18n.t('current_value')}: {current_trigger}[/dim]")
+            console.print(f"   [dim]{current_label}: {current_trigger}[/dim]")
             console.print(f"\n   {i18n.t('trigger_name_desc')}")
             console.print(f"   {i18n.t('trigger_name_examples')}")
             console.print(f"   [yellow]⚠️[/yellow]  {i18n.t('trigger_name_warning')}")
@@ -847,11 +759,11 @@ def interactive_menu(config: Config) -> Config:
         else:
             print(f"\n7️⃣  {i18n.t('trigger_name_prompt')}:")
             current_trigger = config.trigger_name if config.trigger_name else i18n.t('not_selected')
-            print(f"   {i18n.t('current_value')}: {current_trigger}")
+            print(f"   {current_label}: {current_trigger}")
             print(f"\n   {i18n.t('trigger_name_desc')}")
             print(f"   {i18n.t('trigger_name_examples')}")
             print(f"   ⚠️  {i18n.t('trigger_name_warning')}")
-            trigger_input = input(f"\n   {i18n.t('enter')} trigger name ({i18n.t('or')} {i18n.t('press_enter_to_skip')}): ").strip()
+            trigger_input = input(f"\n   {i18n.t('enter')} trigger name ({skip_hint}): ").strip()
         if trigger_input:
             # Убираем пробелы и специальные символы
             trigger_name = trigger_input.replace(' ', '_').replace('-', '_')
@@ -863,9 +775,9 @@ def interactive_menu(config: Config) -> Config:
         else:
             if config.trigger_name:
                 if RICH_AVAILABLE:
-                    console.print(f"   [dim]→ {i18n.t('using_value')} из config: {config.trigger_name}[/dim]")
+                    console.print(f"   [dim]→ {using_label} из config: {config.trigger_name}[/dim]")
                 else:
-                    print(f"   → {i18n.t('using_value')} из config: {config.trigger_name}")
+                    print(f"   → {using_label} из config: {config.trigger_name}")
             else:
                 if RICH_AVAILABLE:
                     console.print(f"   [yellow]⚠️  {i18n.t('trigger_name_not_set')}[/yellow]")
@@ -876,33 +788,23 @@ def interactive_menu(config: Config) -> Config:
         # Выбор провайдера для генерации captions
         if config.generate_captions:
             if RICH_AVAILABLE:
-                console.print("\n[dim]" + "-"*60 + "[/dim]")
+                console.print(_DIM_SEPARATOR)
                 console.print(f"\n[bold cyan]8️⃣  {i18n.t('caption_provider')}:[/bold cyan]")
                 current_provider = getattr(config, 'caption_provider', 'openai')
-                console.print(f"   [dim]{i18n.t('current_value')}: {current_provider}[/dim]")
+                console.print(f"   [dim]{current_label}: {current_provider}[/dim]")
                 console.print(f"\n   {i18n.t('caption_provider_desc')}")
             else:
-                print("\n" + "-"*60)
+                print("\n" + _SEPARATOR)
                 print(f"\n8️⃣  {i18n.t('caption_provider')}:")
                 current_provider = getattr(config, 'caption_provider', 'openai')
-                print(f"   {i18n.t('current_value')}: {current_provider}")
+                print(f"   {current_label}: {current_provider}")
                 print(f"\n   {i18n.t('caption_provider_desc')}")
             
             if INQUIRER_AVAILABLE:
-                questions = [
-                    inquirer.List(
-                        'choice',
-                        message=f"{i18n.t('your_choice')}",
-                        choices=[
-                            (f"OpenAI - {i18n.t('openai_caption_desc')}", '1'),
-                            (f"Grok - {i18n.t('grok_caption_desc')}", '2'),
-                            (f"{i18n.t('press_enter_to_skip')}", '')
-                        ],
-                        default='' if getattr(config, 'caption_provider', None) else None
-                    )
-                ]
-                answers = inquirer.prompt(questions)
-                choice = answers['choice'] if answers else ''
+                choice = _inquirer_choice(i18n, [
+                    (f"OpenAI - {i18n.t('openai_caption_desc')}", '1'),
+                    (f"Grok - {i18n.t('grok_caption_desc')}", '2')
+                ], bool(getattr(config, 'caption_provider', None)))
             else:
                 if RICH_AVAILABLE:
                     console.print("\n   [bold yellow][1][/bold yellow] [bold]OpenAI[/bold]")
@@ -912,11 +814,11 @@ def interactive_menu(config: Config) -> Config:
                     console.print(f"       [green]✓[/green] {i18n.t('grok_caption_desc')}")
                     console.print(f"       [green]✓[/green] {i18n.t('grok_nsfw_support')}")
                     choice = Prompt.ask(
-                        f"\n   [bold]{i18n.t('your_choice')}[/bold]",
+                        f"\n   [bold]{choice_label}[/bold]",
                         choices=["1", "2", ""],
                         default="",
                         show_choices=False
-                    ).strip()
+                    )
                 else:
                     print("\n   [1] OpenAI")
                     print(f"       ✓ {i18n.t('openai_caption_desc')}")
@@ -924,66 +826,59 @@ def interactive_menu(config: Config) -> Config:
                     print(f"\n   [2] Grok")
                     print(f"       ✓ {i18n.t('grok_caption_desc')}")
                     print(f"       ✓ {i18n.t('grok_nsfw_support')}")
-                    choice = input(f"\n   {i18n.t('your_choice')} (1/2 {i18n.t('or')} {i18n.t('press_enter_to_skip')}): ").strip()
+                    choice = input(f"\n   {choice_label} (1/2 {skip_hint}): ").strip()
             
-            providers = {
-                '1': 'openai',
-                '2': 'grok'
-            }
-            if choice in providers:
-                config.caption_provider = providers[choice]
-                if RICH_AVAILABLE:
-                    console.print(f"   [green]✓[/green] {i18n.t('selected')}: [bold]{providers[choice].upper()}[/bold]")
-                else:
-                    print(f"   ✓ {i18n.t('selected')}: {providers[choice].upper()}")
+            if choice in _CAPTION_PROVIDERS:
+                config.caption_provider = _CAPTION_PROVIDERS[choice]
+                _print_selected(console, i18n, config.caption_provider.upper())
             else:
                 if hasattr(config, 'caption_provider') and config.caption_provider:
                     if RICH_AVAILABLE:
-                        console.print(f"   [dim]→ {i18n.t('using_value')} из config: {config.caption_provider}[/dim]")
+                        console.print(f"   [dim]→ {using_label} из config: {config.caption_provider}[/dim]")
                     else:
-                        print(f"   → {i18n.t('using_value')} из config: {config.caption_provider}")
+                        print(f"   → {using_label} из config: {config.caption_provider}")
                 else:
                     config.caption_provider = 'openai'
                     if RICH_AVAILABLE:
-                        console.print(f"   [dim]→ {i18n.t('using_value')} по умолчанию: openai[/dim]")
+                        console.print(f"   [dim]→ {using_label} по умолчанию: openai[/dim]")
                     else:
-                        print(f"   → {i18n.t('using_value')} по умолчанию: openai")
+                        print(f"   → {using_label} по умолчанию: openai")
             
             # Выбор модели в зависимости от провайдера
             if RICH_AVAILABLE:
-                console.print("\n[dim]" + "-"*60 + "[/dim]")
+                console.print(_DIM_SEPARATOR)
                 if config.caption_provider == 'grok':
                     console.print(f"\n[bold cyan]9️⃣  {i18n.t('grok_caption_model')}:[/bold cyan]")
                     current_caption_model = getattr(config, 'grok_caption_model', None) or config.grok_model or "grok-4-1-fast-reasoning"
                 else:
                     console.print(f"\n[bold cyan]9️⃣  {i18n.t('openai_caption_model')}:[/bold cyan]")
                     current_caption_model = getattr(config, 'openai_caption_model', None) or config.openai_model or "gpt-5.1"
-                console.print(f"   [dim]{i18n.t('current_value')}: {current_caption_model}[/dim]")
+                console.print(f"   [dim]{current_label}: {current_caption_model}[/dim]")
             else:
-                print("\n" + "-"*60)
+                print("\n" + _SEPARATOR)
                 if config.caption_provider == 'grok':
                     print(f"\n9️⃣  {i18n.t('grok_caption_model')}:")
                     current_caption_model = getattr(config, 'grok_caption_model', None) or config.grok_model or "grok-4-1-fast-reasoning"
                 else:
                     print(f"\n9️⃣  {i18n.t('openai_caption_model')}:")
                     current_caption_model = getattr(config, 'openai_caption_model', None) or config.openai_model or "gpt-5.1"
-                print(f"   {i18n.t('current_value')}: {current_caption_model}")
+                print(f"   {current_label}: {current_caption_model}")
             
             # Выбор модели в зависимости от провайдера
             if config.caption_provider == 'grok':
                 # Для Grok используется только grok-4-1-fast-reasoning
                 config.grok_caption_model = 'grok-4-1-fast-reasoning'
                 if RICH_AVAILABLE:
-                    console.print(f"   [dim]→ {i18n.t('using_value')} по умолчанию: {config.grok_caption_model}[/dim]")
+                    console.print(f"   [dim]→ {using_label} по умолчанию: {config.grok_caption_model}[/dim]")
                 else:
-                    print(f"   → {i18n.t('using_value')} по умолчанию: {config.grok_caption_model}")
+                    print(f"   → {using_label} по умолчанию: {config.grok_caption_model}")
             else:
                 # Используем только gpt-5.1 для OpenAI captions
                 config.openai_caption_model = 'gpt-5.1'
                 if RICH_AVAILABLE:
-                    console.print(f"   [dim]→ {i18n.t('using_value')} по умолчанию: {config.openai_caption_model}[/dim]")
+                    console.print(f"   [dim]→ {using_label} по умолчанию: {config.openai_caption_model}[/dim]")
                 else:
-                    print(f"   → {i18n.t('using_value')} по умолчанию: {config.openai_caption_model}")
+                    print(f"   → {using_label} по умолчанию: {config.openai_caption_model}")
     elif choice == '2':
         config.generate_captions = False
         if RICH_AVAILABLE:
@@ -993,9 +888,9 @@ def interactive_menu(config: Config) -> Config:
     else:
         if config.generate_captions:
             if RICH_AVAILABLE:
-                console.print(f"   [dim]→ {i18n.t('using_value')} из config: {i18n.t('yes') if config.generate_captions else i18n.t('no')}[/dim]")
+                console.print(f"   [dim]→ {using_label} из config: {i18n.t('yes') if config.generate_captions else i18n.t('no')}[/dim]")
             else:
-                print(f"   → {i18n.t('using_value')} из config: {i18n.t('yes') if config.generate_captions else i18n.t('no')}")
+                print(f"   → {using_label} из config: {i18n.t('yes') if config.generate_captions else i18n.t('no')}")
             if config.generate_captions and not config.trigger_name:
                 if RICH_AVAILABLE:
                     console.print(f"   [yellow]⚠️  {i18n.t('trigger_name_warning_caption')}[/yellow]")
@@ -1027,7 +922,6 @@ def interactive_menu(config: Config) -> Config:
                 elif caption_provider_main == 'grok':
                     config.grok_caption_model_normal = getattr(config, 'grok_caption_model', 'grok-4-1-fast-reasoning')
     
-    i18n = get_i18n()
     if RICH_AVAILABLE:
         console.print("\n")
         console.print(Panel.fit(
@@ -1096,9 +990,9 @@ def interactive_menu(config: Config) -> Config:
                         normal_caption = config.caption_provider_normal if config.caption_provider_normal else i18n.t('main_value', value=caption_provider_main)
                         console.print(f"      [cyan]{i18n.t('provider_captions')}:[/cyan] [bold]{normal_caption}[/bold]")
     else:
-        print("\n" + "="*60)
+        print("\n" + _HEADER_LINE)
         print(f"  ✅ {i18n.t('settings_selected')}")
-        print("="*60)
+        print(_HEADER_LINE)
         print(f"\n📋 {i18n.t('final_settings')}\n")
         
         # Основные настройки
@@ -1,7 +1,7 @@
 """Генератор промптов используя Gemini, OpenAI или Grok"""
 
 import base64
-from typing import List
+from typing import List, Optional
 
 # AI providers
 try:
@@ -56,8 +56,14 @@ class PromptGenerator:
         else:
             raise ValueError(f"Неизвестный AI провайдер: {self.config.ai_provider}")
     
-    def generate_prompt(self, ref_images: List[bytes], sample_image: bytes) -> str:
-        """Генерирует промпт на основе изображений"""
+    def generate_prompt(self, ref_images: List[bytes], sample_image: bytes, ref_b64: Optional[List[str]] = None,
+                        sample_b64: Optional[str] = None) -> str:
+        """Генерирует промпт на основе изображений
+        
+        Args:
+            ref_b64: Заранее закодированные в base64 референсы (чтобы не кодировать их для каждого sample)
+            sample_b64: Заранее закодированный sample (тот же base64 используется и для генерации изображения)
+        """
         # Используем один и тот же промпт для обоих шаблонов
         # Разница только в количестве обрабатываемых изображений
         # Получаем модель Wavespeed из конфига для правильного промпта
@@ -72,9 +78,9 @@ class PromptGenerator:
         if self.config.ai_provider == 'gemini':
             generated_prompt = self._generate_with_gemini(prompt_text, ref_images, sample_image)
         elif self.config.ai_provider == 'openai':
-            generated_prompt = self._generate_with_openai(prompt_text, ref_images, sample_image)
+            generated_prompt = self._generate_with_openai(prompt_text, ref_images, sample_image, ref_b64, sample_b64)
         elif self.config.ai_provider == 'grok':
-            generated_prompt = self._generate_with_grok(prompt_text, ref_images, sample_image)
+            generated_prompt = self._generate_with_grok(prompt_text, ref_images, sample_image, ref_b64, sample_b64)
         else:
             raise ValueError(f"Неподдерживаемый провайдер: {self.config.ai_provider}")
         
@@ -244,7 +250,8 @@ CRITICAL RULES (ABSOLUTE):
         response = self.client.generate_content(parts)
         return response.text.strip()
     
-    def _generate_with_openai(self, prompt_text: str, ref_images: List[bytes], sample_image: bytes) -> str:
+    def _generate_with_openai(self, prompt_text: str, ref_images: List[bytes], sample_image: bytes, ref_b64: Optional[List[str]] = None,
+                              sample_b64: Optional[str] = None) -> str:
         """Генерация промпта через OpenAI"""
         messages = [{
             "role": "user",
@@ -254,8 +261,9 @@ CRITICAL RULES (ABSOLUTE):
         }]
         
         # Добавляем референсные изображения
-        for img_data in ref_images[:2]:
-            img_b64 = base64.b64encode(img_data).decode('utf-8')
+        if ref_b64 is None:
+            ref_b64 = [base64.b64encode(img_data).decode('utf-8') for img_data in ref_images[:2]]
+        for img_b64 in ref_b64[:2]:
             messages[0]["content"].append({
                 "type": "image_url",
                 "image_url": {
@@ -264,7 +272,8 @@ CRITICAL RULES (ABSOLUTE):
             })
         
         # Добавляем sample изображение
-        sample_b64 = base64.b64encode(sample_image).decode('utf-8')
+        if sample_b64 is None:
+            sample_b64 = base64.b64encode(sample_image).decode('utf-8')
         messages[0]["content"].append({
             "type": "image_url",
             "image_url": {
@@ -323,7 +332,8 @@ CRITICAL RULES (ABSOLUTE):
             print(f"   ⚠️  Ошибка: OpenAI не вернул choices для промпта. Модель: {model}")
             return ""
     
-    def _generate_with_grok(self, prompt_text: str, ref_images: List[bytes], sample_image: bytes) -> str:
+    def _generate_with_grok(self, prompt_text: str, ref_images: List[bytes], sample_image: bytes, ref_b64: Optional[List[str]] = None,
+                            sample_b64: Optional[str] = None) -> str:
         """Генерация промпта через Grok (xAI)"""
         messages = [{
             "role": "user",
@@ -333,8 +343,9 @@ CRITICAL RULES (ABSOLUTE):
         }]
         
         # Добавляем референсные изображения
-        for img_data in ref_images[:2]:
-            img_b64 = base64.b64encode(img_data).decode('utf-8')
+        if ref_b64 is None:
+            ref_b64 = [base64.b64encode(img_data).decode('utf-8') for img_data in ref_images[:2]]
+        for img_b64 in ref_b64[:2]:
             messages[0]["content"].append({
                 "type": "image_url",
                 "image_url": {
@@ -343,7 +354,8 @@ CRITICAL RULES (ABSOLUTE):
             })
         
         # Добавляем sample изображение
-        sample_b64 = base64.b64encode(sample_image).decode('utf-8')
+        if sample_b64 is None:
+            sample_b64 = base64.b64encode(sample_image).decode('utf-8')
         messages[0]["content"].append({
             "type": "image_url",
             "image_url": {
@@ -0,0 +1,138 @@
+"""Локальный кэш результатов генерации (LRU + TTL на диске)"""
+
+import os
+import time
+import shutil
+import hashlib
+import tempfile
+import threading
+from typing import Dict, List, Optional
+
+from .config import _dumps, _loads
+
+
+class ResponseCache:
+    """Кэш сгенерированных файлов по ключу запроса
+    
+    Каждая запись - файл <key>.bin с результатом и <key>.json с метаданными
+    (расширение файла). Записи старше ttl не используются, при превышении
+    max_size удаляются записи, к которым дольше всего не обращались.
+    """
+    
+    def __init__(self, cache_dir: str, ttl: float = 7 * 24 * 3600, max_size: int = 1024 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+    
+    @staticmethod
+    def make_key(url: str, params: Dict, images: List[bytes]) -> str:
+        """Ключ запроса: endpoint модели, параметры (без изображений) и хэши изображений"""
+        parts = [url.encode(), _dumps(params)]
+        parts.extend(hashlib.blake2b(data, digest_size=16).digest() for data in images)
+        return hashlib.blake2b(b"|".join(parts), digest_size=16).hexdigest()
+    
+    def _paths(self, key: str):
+        base = os.path.join(self.cache_dir, key)
+        return base + '.bin', base + '.json'
+    
+    def get(self, key: str) -> Optional[Dict]:
+        """Возвращает метаданные записи ({'path', 'ext'}) или None, если записи нет или она устарела"""
+        data_path, meta_path = self._paths(key)
+        try:
+            if time.time() - os.stat(data_path).st_mtime >= self.ttl:
+                return None
+            with open(meta_path, 'rb') as f:
+                meta = _loads(f.read())
+        except (OSError, ValueError):
+            return None
+        # Обновляем время доступа для вытеснения (atime может не обновляться из-за noatime)
+        try:
+            os.utime(data_path, (time.time(), os.stat(data_path).st_mtime))
+        except OSError:
+            pass
+        meta['path'] = data_path
+        return meta
+    
+    def copy_to(self, key: str, output_path: str) -> bool:
+        """Копирует закэшированный результат в output_path; False при промахе"""
+        meta = self.get(key)
+        if meta is None:
+            return False
+        try:
+            shutil.copyfile(meta['path'], output_path)
+        except OSError:
+            return False
+        return True
+    
+    def set(self, key: str, source_path: str, ext: str):
+        """Сохраняет файл результата в кэш
+        
+        Данные и метаданные пишутся во временные файлы и подменяются через os.replace
+        (сначала данные, затем метаданные), поэтому читатель не увидит недописанную запись.
+        """
+        data_path, meta_path = self._paths(key)
+        tmp_paths = []
+        try:
+            data_tmp = self._mkstemp(tmp_paths)
+            shutil.copyfile(source_path, data_tmp)
+            meta_tmp = self._mkstemp(tmp_paths)
+            with open(meta_tmp, 'wb') as f:
+                f.write(_dumps({'ext': ext}))
+            os.replace(data_tmp, data_path)
+            os.replace(meta_tmp, meta_path)
+        except OSError:
+            for tmp_path in tmp_paths:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+            return
+        self._evict()
+    
+    def _mkstemp(self, tmp_paths: List[str]) -> str:
+        """Создает временный файл в папке кэша и запоминает его путь для очистки"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        os.close(fd)
+        tmp_paths.append(tmp_path)
+        return tmp_path
+    
+    def _evict(self):
+        """Удаляет устаревшие записи и самые давние по доступу, пока размер больше max_size"""
+        with self._lock:
+            now = time.time()
+            entries = []
+            total = 0
+            try:
+                with os.scandir(self.cache_dir) as it:
+                    for entry in it:
+                        if not entry.name.endswith('.bin'):
+                            continue
+                        try:
+                            st = entry.stat()
+                        except OSError:
+                            continue
+                        if now - st.st_mtime >= self.ttl:
+                            self._remove(entry.name[:-4])
+                            continue
+                        entries.append((st.st_atime, st.st_size, entry.name[:-4]))
+                        total += st.st_size
+            except OSError:
+                return
+            
+            if total <= self.max_size:
+                return
+            entries.sort()
+            for _, size, key in entries:
+                self._remove(key)
+                total -= size
+                if total <= self.max_size:
+                    break
+    
+    def _remove(self, key: str):
+        for path in self._paths(key):
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
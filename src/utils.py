@@ -1,6 +1,8 @@
 """Вспомогательные функции"""
 
 import os
+import sys
+import logging
 
 try:
     from i18n import set_language
@@ -10,6 +12,27 @@ except ImportError:
     def set_language(lang):
         return True
 
+_LOGGER_NAME = 'src'
+
+
+def setup_logging(quiet: bool = False):
+    """Настраивает вывод сообщений о ходе обработки (logger 'src') в stdout
+    
+    Повторный вызов без quiet не меняет уже настроенный logger.
+    Без вызова (библиотечное использование) logging выводит только предупреждения
+    и ошибки в stderr, сообщения о ходе обработки не печатаются.
+    В режиме quiet выводятся только предупреждения и ошибки.
+    """
+    logger = logging.getLogger(_LOGGER_NAME)
+    if not logger.handlers:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+    if quiet:
+        logger.setLevel(logging.WARNING)
+
 
 def select_language():
     """Выбор языка интерфейса"""